@@ -1,9 +1,10 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from app.db import get_database
+from app.services.auth_cache import AUTH_PROJECTION, auth_cache
+from app.services.password_service import password_service
 import os
 
 
@@ -11,7 +12,8 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your_secret_key_here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Blocking; async handlers should await password_service instead
+pwd_context = password_service.context
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 def verify_password(plain_password, hashed_password):
@@ -32,6 +34,10 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     return encoded_jwt
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
+    cached = auth_cache.get(token)
+    if cached is not None:
+        return cached
+    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -46,8 +52,9 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         raise credentials_exception
         
     db = get_database()
-    user = await db.users.find_one({"email": email})
+    user = await db.users.find_one({"email": email}, AUTH_PROJECTION)
     if user is None:
         raise credentials_exception
-        
-    return user
+    
+    auth_cache.put(token, user, payload.get("exp"))
+    return dict(user)
@@ -1,5 +1,6 @@
 #backend/app/db.py
 from motor.motor_asyncio import AsyncIOMotorClient
+from app.indexes import ensure_indexes
 import os
 
 class MongoDB:
@@ -18,6 +19,7 @@ async def init_db(mongo_url: str = None):
     db.database = db.client.travel_journal_db
     await db.client.admin.command('ping')
     print("Connected to MongoDB successfully!")
+    await ensure_indexes(db.database)
     return db.database
 
 def get_database():
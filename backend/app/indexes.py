@@ -0,0 +1,216 @@
+# backend/app/indexes.py
+import asyncio
+import logging
+from datetime import datetime
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+INDEX_OPTIONS_CONFLICT = 85
+
+# Every index the app relies on, by collection. Names are fixed so that a
+# changed definition shows up as a conflict instead of a silent duplicate.
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("username", ASCENDING)], name="username_unique", unique=True),
+        IndexModel([("username_lower", ASCENDING)], name="username_prefix"),
+        IndexModel([("countriesVisited", DESCENDING), ("_id", ASCENDING)], name="leaderboard"),
+        IndexModel([("followers_count", DESCENDING)], name="followers_count"),
+    ],
+    "trips": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="user_recent_keyset"),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="recent_keyset"),
+        IndexModel([("photo_hdfs_path", ASCENDING)], name="photo_path"),
+        IndexModel([("location", GEOSPHERE)], name="location"),
+        IndexModel(
+            [("place_name", TEXT), ("country", TEXT), ("description", TEXT)],
+            name="text_search",
+            weights={"place_name": 10, "country": 5, "description": 1}
+        ),
+    ],
+    "follows": [
+        IndexModel([("follower_id", ASCENDING), ("following_id", ASCENDING)], name="edge_unique", unique=True),
+        IndexModel([("following_id", ASCENDING), ("follower_id", ASCENDING)], name="edge_reverse"),
+    ],
+    "timelines": [
+        IndexModel([("owner_id", ASCENDING), ("created_at", DESCENDING), ("trip_id", DESCENDING)], name="owner_recent"),
+        IndexModel([("owner_id", ASCENDING), ("trip_id", ASCENDING)], name="owner_trip_unique", unique=True),
+        IndexModel([("owner_id", ASCENDING), ("author_id", ASCENDING)], name="owner_author"),
+        IndexModel([("trip_id", ASCENDING)], name="trip"),
+    ],
+    "user_countries": [
+        IndexModel([("user_id", ASCENDING), ("country", ASCENDING)], name="user_country_unique", unique=True),
+    ],
+    "trip_rollups": [
+        IndexModel([("kind", ASCENDING), ("key", ASCENDING)], name="kind_key_unique", unique=True),
+        IndexModel([("kind", ASCENDING), ("trips", DESCENDING), ("key", ASCENDING)], name="kind_top"),
+    ],
+    "geo_cells": [
+        IndexModel([("precision", ASCENDING), ("cell", ASCENDING)], name="precision_cell_unique", unique=True),
+        IndexModel([("precision", ASCENDING), ("center", GEOSPHERE)], name="precision_center"),
+    ],
+    "storage_usage": [
+        IndexModel([("bytes", DESCENDING)], name="bytes"),
+    ],
+    "packed_objects": [
+        IndexModel([("segment", ASCENDING)], name="segment"),
+    ],
+    "packed_segments": [
+        IndexModel([("retired_at", ASCENDING), ("updated_at", ASCENDING)], name="retired_updated"),
+    ],
+}
+
+# Representative shapes of the hot queries, checked by the explain report
+HOT_QUERIES = [
+    {"name": "login by email", "collection": "users", "filter": {"email": "someone@example.com"}},
+    {"name": "register duplicate check", "collection": "users",
+     "filter": {"$or": [{"email": "someone@example.com"}, {"username": "someone"}]}},
+    {"name": "username typeahead", "collection": "users",
+     "filter": {"username_lower": {"$gte": "ali", "$lt": "ali\U0010ffff"}},
+     "sort": {"username_lower": 1}, "limit": 10},
+    {"name": "leaderboard page", "collection": "users", "filter": {},
+     "sort": {"countriesVisited": -1, "_id": 1}, "limit": 50},
+    {"name": "leaderboard rank", "collection": "users", "filter": {"countriesVisited": {"$gt": 3}}},
+    {"name": "user trips", "collection": "trips", "filter": {"user_id": "000000000000000000000000"},
+     "sort": {"created_at": -1, "_id": -1}, "limit": 20},
+    {"name": "recent trips", "collection": "trips", "filter": {}, "sort": {"created_at": -1, "_id": -1}, "limit": 20},
+    {"name": "recent trips after cursor", "collection": "trips",
+     "filter": {"$or": [{"created_at": {"$lt": datetime(2024, 1, 1)}},
+                        {"created_at": datetime(2024, 1, 1), "_id": {"$lt": ObjectId("0" * 24)}}]},
+     "sort": {"created_at": -1, "_id": -1}, "limit": 20},
+    {"name": "trips sharing a photo", "collection": "trips",
+     "filter": {"photo_hdfs_path": "/travel_journal/photos/original/cas/00/0"}},
+    {"name": "following page", "collection": "follows", "filter": {"follower_id": "000000000000000000000000"},
+     "sort": {"following_id": 1}, "projection": {"_id": 0, "following_id": 1}, "limit": 50},
+    {"name": "followers page", "collection": "follows", "filter": {"following_id": "000000000000000000000000"},
+     "sort": {"follower_id": 1}, "projection": {"_id": 0, "follower_id": 1}, "limit": 50},
+    {"name": "is following", "collection": "follows",
+     "filter": {"follower_id": "000000000000000000000000", "following_id": {"$in": ["000000000000000000000001"]}},
+     "projection": {"_id": 0, "following_id": 1}},
+    {"name": "feed page", "collection": "timelines", "filter": {"owner_id": "000000000000000000000000"},
+     "sort": {"created_at": -1, "trip_id": -1}, "projection": {"_id": 0, "trip": 1}, "limit": 20},
+    {"name": "feed celebrities", "collection": "users", "filter": {"followers_count": {"$gt": 10000}},
+     "projection": {"_id": 1}},
+    {"name": "user country entry", "collection": "user_countries",
+     "filter": {"user_id": "000000000000000000000000", "country": "france"}},
+    {"name": "top countries", "collection": "trip_rollups", "filter": {"kind": "country"},
+     "sort": {"trips": -1, "key": 1}, "limit": 20},
+    {"name": "trips per day", "collection": "trip_rollups",
+     "filter": {"kind": "day", "key": {"$gte": "2024-01-01", "$lte": "2024-01-31"}}},
+    {"name": "map clusters", "collection": "geo_cells",
+     "filter": {"precision": 3, "center": {"$geoWithin": {"$geometry": {"type": "Polygon", "coordinates": [
+         [[0.0, 40.0], [20.0, 40.0], [20.0, 50.0], [0.0, 50.0], [0.0, 40.0]]]}}}},
+     "sort": {"count": -1}, "limit": 500},
+    {"name": "map trips", "collection": "trips",
+     "filter": {"location": {"$geoWithin": {"$geometry": {"type": "Polygon", "coordinates": [
+         [[2.2, 48.8], [2.5, 48.8], [2.5, 48.9], [2.2, 48.9], [2.2, 48.8]]]}}}},
+     "limit": 100},
+    {"name": "trip text search", "collection": "trips", "filter": {"$text": {"$search": "paris"}},
+     "limit": 500},
+    {"name": "top storage users", "collection": "storage_usage", "filter": {}, "sort": {"bytes": -1}, "limit": 10},
+    {"name": "objects in segment", "collection": "packed_objects", "filter": {"segment": "/travel_journal/segments/x"}},
+]
+
+
+async def ensure_indexes(db) -> list:
+    """
+    Create every declared index that is missing
+
+    Safe to run on every startup; existing indexes are left alone. A
+    failure on one index (e.g. duplicate data under a unique index) is
+    logged and does not stop the others.
+
+    Returns:
+        Names of indexes that could not be created
+    """
+    failed = []
+    for collection, indexes in INDEXES.items():
+        for index in indexes:
+            name = index.document["name"]
+            try:
+                await db[collection].create_indexes([index])
+            except OperationFailure as e:
+                if e.code == INDEX_OPTIONS_CONFLICT:
+                    # Same keys already indexed under another name
+                    logger.info(f"Index {collection}.{name} already exists: {str(e)}")
+                    continue
+                logger.error(f"Failed to create index {collection}.{name}: {str(e)}")
+                failed.append(f"{collection}.{name}")
+    return failed
+
+
+def _plan_stages(plan: dict) -> list:
+    stages = [plan.get("stage")]
+    for child in [plan.get("inputStage"), *plan.get("inputStages", [])]:
+        if child:
+            stages.extend(_plan_stages(child))
+    return [stage for stage in stages if stage]
+
+
+async def explain_query(db, query: dict) -> dict:
+    command = {"find": query["collection"], "filter": query["filter"]}
+    for key in ("sort", "projection", "limit"):
+        if key in query:
+            command[key] = query[key]
+    result = await db.command({"explain": command, "verbosity": "queryPlanner"})
+    planner = result.get("queryPlanner", {})
+    # Newer servers nest the classic plan under queryPlan
+    winning = planner.get("winningPlan", {})
+    stages = _plan_stages(winning.get("queryPlan", winning))
+    return {
+        "name": query["name"],
+        "collection": query["collection"],
+        "stages": stages,
+        "collscan": "COLLSCAN" in stages,
+        "in_memory_sort": "SORT" in stages,
+        "covered": "FETCH" not in stages and "COLLSCAN" not in stages,
+    }
+
+
+async def missing_indexes(db) -> list:
+    """Declared indexes whose key pattern is not present, whatever the name"""
+    missing = []
+    for collection, indexes in INDEXES.items():
+        existing = await db[collection].index_information()
+        existing_keys = {tuple(info["key"]) for info in existing.values()}
+        has_text = any(("_fts", "text") in keys for keys in existing_keys)
+        for index in indexes:
+            keys = tuple(index.document["key"].items())
+            # The server stores text indexes under a synthetic _fts key
+            if TEXT in dict(keys).values():
+                if not has_text:
+                    missing.append(f"{collection}.{index.document['name']}")
+                continue
+            if keys not in existing_keys:
+                missing.append(f"{collection}.{index.document['name']}")
+    return missing
+
+
+async def index_report(db) -> dict:
+    """Explain every hot query shape and list declared indexes that are absent"""
+    plans = [await explain_query(db, query) for query in HOT_QUERIES]
+    return {
+        "missing_indexes": await missing_indexes(db),
+        "collscans": [plan["name"] for plan in plans if plan["collscan"]],
+        "plans": plans,
+    }
+
+
+if __name__ == "__main__":
+    import sys
+    from app.db import init_db
+
+    async def main() -> int:
+        db = await init_db()
+        report = await index_report(db)
+        for plan in report["plans"]:
+            flag = "COLLSCAN" if plan["collscan"] else ("covered" if plan["covered"] else "ok")
+            print(f"{flag:9} {plan['collection']:16} {plan['name']:28} {' <- '.join(plan['stages'])}")
+        for name in report["missing_indexes"]:
+            print(f"missing   {name}")
+        return 1 if report["collscans"] or report["missing_indexes"] else 0
+
+    sys.exit(asyncio.run(main()))
@@ -2,13 +2,18 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.db import init_db
+from app.utils.fast_json import FastJSONResponse
+from app.services.auth_cache import auth_cache
+from app.services.password_service import password_service
+from app.services.upload_admission import UploadAdmissionMiddleware
 from app.routes import auth_routes, user_routes, trip_routes, media_routes, admin_router
 import os
 
 app = FastAPI(
     title="Interactive Travel Journal API",
     description="Backend for Interactive Travel Journal Application",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # Include Routers
@@ -18,6 +23,9 @@ app.include_router(user_routes.router, prefix="/api/users", tags=["Users"])
 app.include_router(trip_routes.router, prefix="/api/trips", tags=["Trips"])
 app.include_router(media_routes.router, prefix="/api", tags=["Media"])
 
+# Admit uploads against the per-worker memory budget before reading bodies
+app.add_middleware(UploadAdmissionMiddleware)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -31,8 +39,15 @@ app.add_middleware(
 async def startup_event():
     mongo_url = os.getenv("MONGODB_URL")
     await init_db(mongo_url)
+    # Needs the database, so it starts here rather than in a router hook
+    await auth_cache.start()
     print("🚀 Travel Journal Backend Started Successfully!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    await auth_cache.stop()
+    password_service.shutdown()
+
 @app.get("/")
 async def root():
     return {"message": "Interactive Travel Journal API running", "version": "1.0.0"}
@@ -1,10 +1,18 @@
 # backend/app/routers/admin_router.py
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.db import get_database
 from app.utils.security import create_access_token, decode_access_token
-from typing import List, Dict
+from app.schemas.user_schema import AdminUserOut
+from app.utils.ndjson import NDJSON_MEDIA_TYPE, stream_json_array, stream_ndjson
+from app.services.user_search import PREFIX_END, normalize_username
+from app.services.auth_cache import auth_cache
+from app.services.password_service import password_service
+from bson import ObjectId
+from datetime import datetime
+from typing import List, Optional
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -35,18 +43,69 @@ async def admin_login(data: AdminLoginSchema):
     token = create_access_token(subject="admin")
     return {"token": token}
 
-@router.get("/users", response_model=List[Dict])
+ADMIN_USER_PROJECTION = {
+    "_id": 0,
+    "id": {"$toString": "$_id"},
+    "username": 1,
+    "email": 1,
+    "travel_style": {"$ifNull": ["$travel_style", None]},
+    "isAdmin": {"$ifNull": ["$isAdmin", False]}
+}
+
+@router.get("/users", response_model=List[AdminUserOut])
 async def get_all_users(admin: bool = Depends(get_current_admin)):
     db = get_database()
-    users = await db["users"].find().to_list(length=None)
-    
-    result = []
-    for user in users:
-        result.append({
-            "id": str(user["_id"]),
-            "username": user.get("username"),
-            "email": user.get("email"),
-            "travel_style": user.get("travel_style"),
-            "isAdmin": user.get("isAdmin", False)
-        })
-    return result
+    # Streamed as a JSON array so memory stays flat however many users exist
+    cursor = db["users"].find({}, ADMIN_USER_PROJECTION).sort("_id", 1).batch_size(500)
+    return StreamingResponse(stream_json_array(cursor), media_type="application/json")
+
+@router.get("/users/export")
+async def export_users(
+    after: Optional[str] = Query(None, description="Resume after this user id (the last id received)"),
+    since: Optional[datetime] = Query(None, description="Only users created at or after this time"),
+    username_prefix: Optional[str] = None,
+    is_admin: Optional[bool] = None,
+    travel_style: Optional[str] = None,
+    batch_size: int = Query(500, ge=10, le=5000),
+    admin: bool = Depends(get_current_admin)
+):
+    """
+    Stream users as NDJSON in _id order
+
+    Each line carries the user's id; if a download is interrupted, pass the
+    last id received as `after` to continue where it stopped.
+    """
+    query = {}
+    id_range = {}
+    if after:
+        if not ObjectId.is_valid(after):
+            raise HTTPException(status_code=400, detail="Invalid after cursor")
+        id_range["$gt"] = ObjectId(after)
+    if since:
+        # ObjectIds start with their creation time
+        id_range["$gte"] = ObjectId.from_datetime(since)
+    if id_range:
+        query["_id"] = id_range
+    if username_prefix:
+        prefix = normalize_username(username_prefix)
+        query["username_lower"] = {"$gte": prefix, "$lt": prefix + PREFIX_END}
+    if is_admin is not None:
+        query["isAdmin"] = True if is_admin else {"$ne": True}
+    if travel_style:
+        query["travel_style"] = travel_style
+
+    db = get_database()
+    cursor = db["users"].find(query, ADMIN_USER_PROJECTION).sort("_id", 1).batch_size(batch_size)
+    return StreamingResponse(
+        stream_ndjson(cursor),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": 'attachment; filename="users.ndjson"'}
+    )
+
+@router.get("/auth-cache/stats")
+async def get_auth_cache_stats(admin: bool = Depends(get_current_admin)):
+    return auth_cache.stats()
+
+@router.get("/password-pool/stats")
+async def get_password_pool_stats(admin: bool = Depends(get_current_admin)):
+    return password_service.stats()
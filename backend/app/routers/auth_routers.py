@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel, EmailStr
 from app.db import get_database
-from app.auth import get_password_hash, verify_password, create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.auth import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.services.password_service import password_service
+from app.services.user_search import normalize_username, user_search
 from datetime import timedelta
 from typing import Optional
 
@@ -37,13 +39,15 @@ async def register(user_data: UserRegister):
             detail="User with this email or username already exists"
         )
 
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await password_service.hash(user_data.password)
     
     new_user = user_data.dict()
     new_user["password"] = hashed_password
+    new_user["username_lower"] = normalize_username(user_data.username)
     new_user["countriesVisited"] = 0 
     
     result = await db["users"].insert_one(new_user)
+    user_search.invalidate(user_data.username)
     
     return {"message": "User registered successfully", "id": str(result.inserted_id)}
 
@@ -56,8 +60,12 @@ async def login(login_data: UserLogin):
     if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
-    if not verify_password(login_data.password, user["password"]):
+    valid, new_hash = await password_service.verify(login_data.password, user["password"])
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid email or password")
+    if new_hash:
+        # Stored with an old cost factor; upgrade while we have the plaintext
+        await db["users"].update_one({"_id": user["_id"]}, {"$set": {"password": new_hash}})
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -1,6 +1,10 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
 from bson import ObjectId
 from app.db import get_database
+from app.services.analytics_service import analytics_sink
+from app.services.follow_service import follow_service
+from app.services.feed_service import feed_service
+from app.services.user_search import user_search
 
 router = APIRouter(prefix="/friends", tags=["Friends"])
 
@@ -14,7 +18,7 @@ def validate_object_id(id_str: str):
 
 
 @router.post("/follow/{friend_id}")
-async def toggle_follow(friend_id: str, user_id: str = Query(...)):
+async def toggle_follow(friend_id: str, background_tasks: BackgroundTasks, user_id: str = Query(...)):
     """
     Follow or unfollow a friend.
     """
@@ -22,20 +26,22 @@ async def toggle_follow(friend_id: str, user_id: str = Query(...)):
     user_oid = validate_object_id(user_id)
     friend_oid = validate_object_id(friend_id)
 
-    user = await db.users.find_one({"_id": user_oid})
+    if user_oid == friend_oid:
+        raise HTTPException(400, "Users cannot follow themselves")
+
+    user = await db.users.find_one({"_id": user_oid}, {"_id": 1})
     if not user:
         raise HTTPException(404, "User not found")
 
-    following = [str(fid) for fid in user.get("following", [])]
-
-    if str(friend_oid) in following:
-        following.remove(str(friend_oid))
+    is_following = await follow_service.toggle(str(user_oid), str(friend_oid))
+    action = "follow" if is_following else "unfollow"
+    if is_following:
+        background_tasks.add_task(feed_service.on_follow, str(user_oid), str(friend_oid))
     else:
-        following.append(str(friend_oid))
+        background_tasks.add_task(feed_service.on_unfollow, str(user_oid), str(friend_oid))
+    analytics_sink.emit(action, follower_id=user_id, following_id=friend_id)
 
-    await db.users.update_one({"_id": user_oid}, {"$set": {"following": following}})
-
-    return {"status": "success", "following": following}
+    return {"status": "success", "action": action, "isFollowing": is_following}
 
 
 @router.get("/")
@@ -48,9 +54,9 @@ async def get_friends(email: str = Query(...)):
     if not user:
         raise HTTPException(404, "User not found")
 
-    following_ids = [ObjectId(fid) for fid in user.get("following", [])]
+    following_ids = await follow_service.following(str(user["_id"]), limit=100)
 
-    friends = await db.users.find({"_id": {"$in": following_ids}}).to_list(100)
+    friends = await db.users.find({"_id": {"$in": [ObjectId(fid) for fid in following_ids]}}).to_list(100)
 
     result = []
     for f in friends:
@@ -67,25 +73,13 @@ async def get_friends(email: str = Query(...)):
 
 
 @router.get("/search")
-async def search_users(username: str = Query(...)):
+async def search_users(username: str = Query(...), limit: int = Query(10, ge=1, le=50)):
     """
-    Search users by username (case-insensitive)
+    Search users whose username starts with the given prefix (case-insensitive)
     """
-    db = get_database()
-    users = await db.users.find({"username": {"$regex": username, "$options": "i"}}).to_list(50)
+    users = await user_search.search(username, limit=limit)
 
-    result = []
-    for u in users:
-        result.append({
-            "id": str(u["_id"]),
-            "username": u["username"],
-            "email": u["email"],
-            "profilePic": u.get("profilePic"),
-            "countriesVisited": u.get("countriesVisited", 0),
-            "isFollowing": False
-        })
-
-    return result
+    return [{**u, "isFollowing": False} for u in users]
 
 
 @router.get("/leaderboard")
@@ -96,13 +90,13 @@ async def get_leaderboard(user_id: str = Query(...)):
     db = get_database()
     user_oid = validate_object_id(user_id)
 
-    current_user = await db.users.find_one({"_id": user_oid})
+    current_user = await db.users.find_one({"_id": user_oid}, {"_id": 1})
     if not current_user:
         raise HTTPException(404, "User not found")
 
-    users = await db.users.find().sort("countriesVisited", -1).to_list(50)
+    users = await db.users.find().sort([("countriesVisited", -1), ("_id", 1)]).to_list(50)
 
-    following = [str(fid) for fid in current_user.get("following", [])]
+    following = await follow_service.is_following(user_id, [str(u["_id"]) for u in users])
 
     result = []
     for u in users:
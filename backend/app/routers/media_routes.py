@@ -1,12 +1,13 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from app.db import get_database
+from app.services.storage_backend import storage
 import uuid
 import os
 from datetime import datetime
 
 router = APIRouter()
-UPLOAD_FOLDER = "uploads"
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+UPLOAD_FOLDER = f"{storage.base_path}/uploads/travel_logs"
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
 
 @router.post("/travel_logs/upload")
 async def upload_travel_log(
@@ -18,10 +19,9 @@ async def upload_travel_log(
 ):
     db = get_database()
     try:
-        file_id = f"{uuid.uuid4()}_{photo.filename}"
-        file_path = os.path.join(UPLOAD_FOLDER, file_id)
-        with open(file_path, "wb") as f:
-            f.write(await photo.read())
+        file_id = f"{uuid.uuid4()}_{os.path.basename(photo.filename)}"
+        file_path = f"{UPLOAD_FOLDER}/{file_id}"
+        await storage.write_stream(file_path, photo.file, MAX_UPLOAD_SIZE, require_image=False)
 
         await db["travel_logs"].insert_one({
             "user_id": user_id,
@@ -32,5 +32,9 @@ async def upload_travel_log(
             "created_at": datetime.utcnow(),
         })
         return {"status": "success", "message": "Trip uploaded successfully!"}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await photo.close()
@@ -1,26 +1,67 @@
-from fastapi import APIRouter, UploadFile, Form, File, HTTPException, Depends, BackgroundTasks
-from fastapi.responses import Response
+from fastapi import APIRouter, UploadFile, Form, File, HTTPException, Depends, BackgroundTasks, Request, Query
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from app.db import get_database
-from app.services.hdfs_service import hdfs_service
+from app.services.storage_backend import storage
+from app.services.thumbnail_service import thumbnail_service
+from app.services.photo_cache import photo_cache
+from app.services.blob_service import blob_service
+from app.services.analytics_service import analytics_sink
+from app.services.storage_stats import storage_stats
+from app.services.leaderboard_service import leaderboard_service
+from app.services.feed_service import feed_service
+from app.services.rollup_service import rollup_service
+from app.services.geo_service import geo_service
+from app.services.trip_search import trip_search
+from app.services.import_service import extract_archive, match_metadata, parse_manifest, trip_import_service
+from app.services.upload_admission import upload_admission
 from app.auth import get_current_user
+from app.utils.range_utils import (
+    RangeNotSatisfiable, etag_matches, http_date, make_etag, parse_range_header
+)
+from app.utils.pagination import KEYSET_SORT, encode_cursor, keyset_filter
+from app.utils.trip_views import trip_summary_projection, trip_url_fields
+from app.utils.fast_json import FastJSONResponse
+from app.utils.geo import exif_gps
+from app.schemas.trip_schema import TripPage
 import uuid
 import os
+import asyncio
 from datetime import datetime
 from bson import ObjectId
 import logging
-from typing import Optional
+from typing import List, Optional
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+MAX_PHOTO_SIZE = 10 * 1024 * 1024
+MAX_PAGE_SIZE = 100
+
+def storage_path_fields() -> list:
+    """Internal storage paths on a trip document, never returned to clients"""
+    return ["photo_hdfs_path", *(f"renditions.{key}.path" for key in thumbnail_service.rendition_keys())]
+
 @router.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
-    logger.info("Initializing HDFS connection...")
-    if hdfs_service.connect():
-        logger.info("HDFS connected successfully")
+    logger.info(f"Initializing {storage.name} storage...")
+    if await storage.connect():
+        logger.info(f"{storage.name} storage connected successfully")
     else:
-        logger.warning("HDFS connection failed, will use fallback storage")
+        logger.warning(f"{storage.name} storage connection failed, will retry on first use")
+    await analytics_sink.start()
+    await storage_stats.start()
+    await trip_search.start()
+
+@router.on_event("shutdown")
+async def shutdown_event():
+    """Flush buffered analytics and release storage connections on shutdown"""
+    await trip_search.stop()
+    await storage_stats.stop()
+    await analytics_sink.stop()
+    thumbnail_service.shutdown()
+    await storage.close()
+    storage.shutdown()
 
 @router.post("/upload")
 async def upload_trip(
@@ -37,49 +78,61 @@ async def upload_trip(
         if not photo.content_type.startswith('image/'):
             raise HTTPException(status_code=400, detail="File must be an image")
         
-        photo_data = await photo.read()
-        
-        if len(photo_data) > 10 * 1024 * 1024: 
-            raise HTTPException(status_code=400, detail="Image size must be less than 10MB")
-        
         user_id = str(current_user.get("_id"))
         
-        hdfs_path = hdfs_service.upload_photo(user_id, photo_data, photo.filename)
-        
-        trip_data = {
-            "user_id": user_id,
-            "user_email": current_user.get("email"),
-            "username": current_user.get("username"),
-            "country": country,
-            "place_name": place_name,
-            "description": description,
-            "photo_hdfs_path": hdfs_path,
-            "photo_filename": photo.filename,
-            "photo_size": len(photo_data),
-            "photo_content_type": photo.content_type,
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
-        
-        result = await db["trips"].insert_one(trip_data)
+        upload = await blob_service.store(photo.file, MAX_PHOTO_SIZE)
+        hdfs_path = upload["hdfs_path"]
+        trip_data = {}
+        try:
+            gps = await asyncio.to_thread(exif_gps, photo.file)
+            
+            renditions = None
+            if upload["deduplicated"]:
+                renditions = await thumbnail_service.shared_renditions(hdfs_path)
+            
+            trip_data = {
+                "user_id": user_id,
+                "user_email": current_user.get("email"),
+                "username": current_user.get("username"),
+                "country": country,
+                "place_name": place_name,
+                "description": description,
+                "photo_hdfs_path": hdfs_path,
+                "photo_filename": photo.filename,
+                "photo_size": upload["size"],
+                "photo_content_type": upload["content_type"],
+                "photo_sha256": upload["sha256"],
+                "renditions": renditions or thumbnail_service.pending_renditions(),
+                **geo_service.locate(country, place_name, gps),
+                "created_at": datetime.utcnow(),
+                "updated_at": datetime.utcnow()
+            }
+            
+            result = await db["trips"].insert_one(trip_data)
+        except Exception:
+            await release_upload(upload, trip_data.get("_id"))
+            raise
         trip_id = str(result.inserted_id)
         
-        await db.users.update_one(
-            {"_id": ObjectId(user_id)},
-            {"$inc": {"countriesVisited": 1}}
-        )
+        await leaderboard_service.record_trip(user_id, country)
+        await rollup_service.record_trip(trip_data)
+        await geo_service.record_trips([trip_data])
+        
+        if not renditions:
+            background_tasks.add_task(thumbnail_service.process, trip_id, hdfs_path)
+        background_tasks.add_task(feed_service.fan_out, trip_data)
         
-        background_tasks.add_task(
-            create_analytics_log,
-            user_id=user_id,
-            trip_id=trip_id,
-            country=country
+        await storage_stats.record_upload(
+            user_id, upload["size"], 0 if upload["deduplicated"] else upload["size"]
         )
         
+        analytics_sink.emit("trip_upload", user_id=user_id, trip_id=trip_id, country=country)
+        
         return {
             "message": "Trip uploaded successfully",
             "trip_id": trip_id,
             "hdfs_path": hdfs_path,
+            "deduplicated": upload["deduplicated"],
             "photo_url": f"/api/trips/photo/{trip_id}"
         }
         
@@ -91,6 +144,107 @@ async def upload_trip(
     finally:
         await photo.close()
 
+@router.post("/import")
+async def import_trips(
+    background_tasks: BackgroundTasks,
+    photos: List[UploadFile] = File(None),
+    archive: Optional[UploadFile] = File(None),
+    metadata: Optional[str] = Form(None),
+    country: Optional[str] = Form(None),
+    place_name: Optional[str] = Form(None),
+    description: Optional[str] = Form(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Create many trips in one request
+
+    Send photos as repeated `photos` parts or as one zip `archive`.
+    `metadata` (or a manifest.json inside the zip) is a JSON list of
+    {filename?, country, place_name, description}; `country`, `place_name`
+    and `description` form fields fill in anything an entry leaves out.
+    """
+    photos = photos or []
+    if bool(photos) == bool(archive):
+        raise HTTPException(status_code=400, detail="Send either photos or an archive")
+
+    spools = []
+    try:
+        if archive:
+            members, manifest = await asyncio.to_thread(
+                extract_archive, archive.file, trip_import_service.max_items, MAX_PHOTO_SIZE
+            )
+            spools = [spool for _, spool in members if spool is not None]
+            sources = members
+            metadata = metadata or manifest
+        else:
+            sources = [(photo.filename, photo.file) for photo in photos]
+
+        entries = parse_manifest(metadata)
+        defaults = {"country": country, "place_name": place_name, "description": description}
+        matched = match_metadata([name for name, _ in sources], entries, defaults)
+        items = [
+            {"filename": name, "source": source, **fields}
+            for (name, source), fields in zip(sources, matched)
+        ]
+
+        summary = await trip_import_service.import_trips(current_user, items, MAX_PHOTO_SIZE)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Trip import failed: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to import trips")
+    finally:
+        for spool in spools:
+            spool.close()
+        for photo in photos:
+            await photo.close()
+        if archive:
+            await archive.close()
+
+    rendering = set()
+    for trip, rendered in zip(summary["trips"], summary["rendered"]):
+        # Deduplicated photos share one original, so render each path once
+        if not rendered and trip["photo_hdfs_path"] not in rendering:
+            rendering.add(trip["photo_hdfs_path"])
+            background_tasks.add_task(thumbnail_service.process, str(trip["_id"]), trip["photo_hdfs_path"])
+        background_tasks.add_task(feed_service.fan_out, trip)
+
+    return {
+        "message": f"Imported {summary['created']} of {len(summary['results'])} photos",
+        "created": summary["created"],
+        "failed": summary["failed"],
+        "results": summary["results"]
+    }
+
+@router.get("/search")
+async def search_trips(
+    q: str = Query(..., min_length=1, max_length=200),
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=50)
+):
+    """Trips whose place, country or description match `q`, best and newest first"""
+    try:
+        return FastJSONResponse(await trip_search.search(q, page=page, limit=limit))
+    except Exception as e:
+        logger.error(f"Trip search failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to search trips")
+
+@router.get("/feed", response_model=TripPage)
+async def get_feed(
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Trips by the current user and the people they follow, newest first"""
+    try:
+        page = await feed_service.feed(str(current_user.get("_id")), limit=limit, cursor=cursor)
+        return FastJSONResponse(page)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get feed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve feed")
+
 @router.get("/{trip_id}")
 async def get_trip(trip_id: str):
     """Get a single trip details by ID"""
@@ -108,8 +262,11 @@ async def get_trip(trip_id: str):
         trip["photo_url"] = f"/api/trips/photo/{trip['_id']}"
         trip["thumbnail_url"] = f"/api/trips/photo/{trip['_id']}?thumbnail=true"
         
-        if "photo_hdfs_path" in trip:
-            del trip["photo_hdfs_path"]
+        trip.pop("photo_hdfs_path", None)
+        for rendition in trip.get("renditions", {}).values():
+            rendition.pop("path", None)
+        
+        analytics_sink.emit("trip_view", trip_id=trip_id, user_id=trip.get("user_id"))
             
         return {"trip": trip}
         
@@ -120,7 +277,19 @@ async def get_trip(trip_id: str):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/photo/{trip_id}")
-async def get_trip_photo(trip_id: str, thumbnail: bool = False):
+async def get_trip_photo(
+    trip_id: str,
+    request: Request,
+    thumbnail: bool = False,
+    size: Optional[str] = None
+):
+    """
+    Serve a trip photo
+    
+    `size` picks a rendition (grid, card, full) or the untouched original;
+    `thumbnail=true` is shorthand for the grid rendition. Without either the
+    full-screen rendition is served once it is ready.
+    """
     db = get_database()
     try:
         if not ObjectId.is_valid(trip_id):
@@ -130,74 +299,182 @@ async def get_trip_photo(trip_id: str, thumbnail: bool = False):
         if not trip:
             raise HTTPException(status_code=404, detail="Trip not found")
         
-        hdfs_path = trip.get("photo_hdfs_path")
-        if not hdfs_path:
+        original_path = trip.get("photo_hdfs_path")
+        if not original_path:
             raise HTTPException(status_code=404, detail="Photo not found")
         
         if thumbnail:
-            hdfs_path = hdfs_path.replace("/original/", "/thumbnails/")
+            size = "grid"
+        size = size or "full"
         
-        try:
-            photo_data = hdfs_service.read_file(hdfs_path)
-        except Exception:
-            if thumbnail:
-                hdfs_path = trip.get("photo_hdfs_path")
-                photo_data = hdfs_service.read_file(hdfs_path)
+        hdfs_path = original_path
+        total_size = trip.get("photo_size", 0)
+        content_type = trip.get("photo_content_type", "image/jpeg")
+        legacy_thumbnail = False
+        
+        rendition = thumbnail_service.select_rendition(trip, size, request.headers.get("accept"))
+        if rendition:
+            hdfs_path = rendition["path"]
+            total_size = rendition["size"]
+            content_type = rendition["content_type"]
+        elif size == "grid" and "renditions" not in trip:
+            # Trips uploaded before renditions existed have a single thumbnail
+            hdfs_path = original_path.replace("/original/", "/thumbnails/")
+            legacy_thumbnail = True
+        
+        if_none_match = request.headers.get("if-none-match")
+        
+        # ETag only depends on Mongo metadata, so revalidation never touches storage
+        etag = make_etag(hdfs_path, total_size)
+        if etag_matches(if_none_match, etag):
+            return photo_not_modified(trip, etag)
+        
+        data = None
+        if legacy_thumbnail:
+            data = await photo_cache.get(hdfs_path)
+            status = None
+            if data is None:
+                status = await storage.stat(hdfs_path)
+            if data is not None or status:
+                total_size = len(data) if data is not None else status.get("length", 0)
+                content_type = "image/png" if hdfs_path.endswith(".png") else "image/jpeg"
+                if data is None and photo_cache.accepts(total_size):
+                    data = await storage.read(hdfs_path)
+                    await photo_cache.put(hdfs_path, data)
             else:
-                raise
+                hdfs_path = original_path
+                etag = make_etag(hdfs_path, total_size)
+                if etag_matches(if_none_match, etag):
+                    return photo_not_modified(trip, etag)
+        elif not total_size:
+            status = await storage.stat(hdfs_path)
+            if not status:
+                raise HTTPException(status_code=404, detail="Photo not found")
+            total_size = status.get("length", 0)
         
-        content_type = trip.get("photo_content_type", "image/jpeg")
+        headers = photo_headers(trip, etag)
         
-        return Response(
-            content=photo_data,
-            media_type=content_type,
-            headers={
-                "Content-Disposition": f'inline; filename="{trip.get("photo_filename", "photo.jpg")}"',
-                "Cache-Control": "public, max-age=86400"
-            }
-        )
+        byte_range = None
+        if_range = request.headers.get("if-range")
+        if not if_range or if_range.strip() == etag:
+            try:
+                byte_range = parse_range_header(request.headers.get("range"), total_size)
+            except RangeNotSatisfiable:
+                headers["Content-Range"] = f"bytes */{total_size}"
+                return Response(status_code=416, headers=headers)
+        
+        local_path = None if data is not None else storage.local_file(hdfs_path)
+        if local_path and not byte_range:
+            # Served with sendfile straight from the page cache, so skip the memory cache
+            return FileResponse(local_path, media_type=content_type, headers=headers)
+        
+        if data is None and not local_path and photo_cache.accepts(total_size):
+            data = await photo_cache.get_or_load(hdfs_path, storage.read)
+        
+        if data is not None:
+            if byte_range:
+                start, end = byte_range
+                headers["Content-Range"] = f"bytes {start}-{end}/{total_size}"
+                return Response(
+                    content=data[start:end + 1], status_code=206, media_type=content_type, headers=headers
+                )
+            return Response(content=data, media_type=content_type, headers=headers)
+        
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            stream = await storage.open_stream(hdfs_path, offset=start, length=length)
+            headers["Content-Range"] = f"bytes {start}-{end}/{total_size}"
+            headers["Content-Length"] = str(length)
+            return StreamingResponse(stream, status_code=206, media_type=content_type, headers=headers)
+        
+        stream = await storage.open_stream(hdfs_path)
+        headers["Content-Length"] = str(total_size)
+        return StreamingResponse(stream, media_type=content_type, headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to serve photo: {str(e)}")
         raise HTTPException(status_code=404, detail="Photo not found or accessible")
 
-@router.get("/")
-async def get_trips(current_user: dict = Depends(get_current_user)):
+def photo_headers(trip: dict, etag: str) -> dict:
+    headers = {
+        "Content-Disposition": f'inline; filename="{trip.get("photo_filename", "photo.jpg")}"',
+        "Cache-Control": "public, max-age=86400",
+        "Accept-Ranges": "bytes",
+        "Vary": "Accept",
+        "ETag": etag
+    }
+    last_modified = http_date(trip.get("updated_at") or trip.get("created_at"))
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+def photo_not_modified(trip: dict, etag: str) -> Response:
+    headers = photo_headers(trip, etag)
+    del headers["Content-Disposition"]
+    return Response(status_code=304, headers=headers)
+
+async def list_trips(query: dict, limit: int, cursor: Optional[str], view: str) -> dict:
+    """
+    One page of trips, newest first, continuing after `cursor`
+    
+    Returns:
+        Dict with trips and next_cursor (None on the last page)
+    """
     db = get_database()
+    pipeline = [
+        {"$match": {**query, **keyset_filter(cursor)}},
+        {"$sort": dict(KEYSET_SORT)},
+        {"$limit": limit},
+    ]
+    if view == "full":
+        pipeline += [{"$set": trip_url_fields()}, {"$unset": storage_path_fields()}]
+    else:
+        pipeline.append({"$project": trip_summary_projection()})
+    
+    trips = await db["trips"].aggregate(pipeline).to_list(limit)
+    
+    next_cursor = None
+    if len(trips) == limit:
+        last = trips[-1]
+        next_cursor = encode_cursor(last["created_at"], last["_id"])
+    return {"trips": trips, "next_cursor": next_cursor}
+
+@router.get("/", response_model=TripPage)
+async def get_trips(
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    view: str = Query("summary", pattern="^(summary|full)$"),
+    current_user: dict = Depends(get_current_user)
+):
     try:
-        trips = await db["trips"].find().sort("created_at", -1).to_list(100)
-        
-        for trip in trips:
-            trip["_id"] = str(trip["_id"])
-            trip["photo_url"] = f"/api/trips/photo/{trip['_id']}"
-            trip["thumbnail_url"] = f"/api/trips/photo/{trip['_id']}?thumbnail=true"
-            if "photo_hdfs_path" in trip:
-                del trip["photo_hdfs_path"]
-        
-        return {"trips": trips}
+        return FastJSONResponse(await list_trips({}, limit, cursor, view))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to get trips: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve trips")
 
-@router.get("/user/{user_id}")
-async def get_user_trips(user_id: str):
+@router.get("/user/{user_id}", response_model=TripPage)
+async def get_user_trips(
+    user_id: str,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    view: str = Query("summary", pattern="^(summary|full)$")
+):
     db = get_database()
     try:
         if not ObjectId.is_valid(user_id):
-            return {"trips": []}
+            return FastJSONResponse({"trips": [], "next_cursor": None})
 
-        user = await db["users"].find_one({"_id": ObjectId(user_id)})
+        user = await db["users"].find_one({"_id": ObjectId(user_id)}, {"_id": 1})
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        trips = await db["trips"].find({"user_id": user_id}).sort("created_at", -1).to_list(100)
-        
-        for trip in trips:
-            trip["_id"] = str(trip["_id"])
-            trip["photo_url"] = f"/api/trips/photo/{trip['_id']}"
-            if "photo_hdfs_path" in trip:
-                del trip["photo_hdfs_path"]
-        
-        return {"trips": trips}
+        return FastJSONResponse(await list_trips({"user_id": user_id}, limit, cursor, view))
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to get user trips: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to retrieve user trips")
@@ -216,21 +493,31 @@ async def delete_trip(trip_id: str, current_user: dict = Depends(get_current_use
         if str(trip["user_id"]) != str(current_user.get("_id")):
             raise HTTPException(status_code=403, detail="Not authorized to delete this trip")
         
+        result = await db["trips"].delete_one({"_id": ObjectId(trip_id)})
+        if result.deleted_count == 0:
+            raise HTTPException(status_code=404, detail="Trip not found")
+        
+        await leaderboard_service.remove_trip(trip["user_id"], trip.get("country"))
+        await feed_service.remove_trip(trip["_id"])
+        await rollup_service.remove_trip(trip)
+        await geo_service.remove_trip(trip)
+        trip_search.remove_trip(trip_id)
+        
+        analytics_sink.emit(
+            "trip_delete", user_id=trip["user_id"], trip_id=trip_id, country=trip.get("country")
+        )
+        
+        freed = False
         try:
-            hdfs_path = trip.get("photo_hdfs_path")
-            if hdfs_path:
-                hdfs_service.delete_file(hdfs_path)
-                thumb_path = hdfs_path.replace("/original/", "/thumbnails/")
-                hdfs_service.delete_file(thumb_path)
+            freed = await delete_trip_photo(trip)
         except Exception as e:
-            logger.warning(f"HDFS deletion failed (continuing with DB delete): {e}")
-
-        await db["trips"].delete_one({"_id": ObjectId(trip_id)})
+            logger.warning(f"Photo deletion failed (trip already removed): {e}")
         
-        await db.users.update_one(
-            {"_id": ObjectId(trip["user_id"])},
-            {"$inc": {"countriesVisited": -1}}
-        )
+        if trip.get("photo_hdfs_path"):
+            photo_size = trip.get("photo_size", 0)
+            # stored_bytes only counts content-addressed blobs, not legacy per-trip files
+            counted = freed and blob_service.is_blob_path(trip["photo_hdfs_path"])
+            await storage_stats.record_delete(trip["user_id"], photo_size, photo_size if counted else 0)
         
         return {"message": "Trip deleted successfully"}
         
@@ -240,31 +527,151 @@ async def delete_trip(trip_id: str, current_user: dict = Depends(get_current_use
         logger.error(f"Failed to delete trip: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to delete trip")
 
-async def create_analytics_log(user_id: str, trip_id: str, country: str):
+async def release_upload(upload: dict, trip_id=None):
+    """Give back the blob reference taken for a trip that was not saved"""
     try:
-        log_entry = {
-            "user_id": user_id,
-            "trip_id": trip_id,
-            "country": country,
-            "timestamp": datetime.utcnow().isoformat(),
-            "action": "trip_upload"
-        }
-        import json
-        log_data = json.dumps(log_entry).encode('utf-8')
-        log_filename = f"{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{trip_id}.json"
-        
-        log_path = f"/analytics/{log_filename}"
-        if hasattr(hdfs_service, 'base_path'):
-             log_path = f"{hdfs_service.base_path}/analytics/{log_filename}"
-             
-        if hdfs_service.client:
-            with hdfs_service.client.write(log_path, overwrite=True) as writer:
-                writer.write(log_data)
+        # insert_one may have written the trip before failing; it then keeps the blob
+        if trip_id and await get_database()["trips"].find_one({"_id": trip_id}, {"_id": 1}):
+            return
+        if await blob_service.release(upload["sha256"], upload["hdfs_path"]):
+            await storage.delete(upload["hdfs_path"])
+    except Exception as e:
+        logger.warning(f"Failed to release uploaded photo {upload['hdfs_path']}: {str(e)}")
+
+async def delete_trip_photo(trip: dict) -> bool:
+    """
+    Drop a trip's reference to its photo, deleting the files once unreferenced
+    
+    Returns:
+        True if the stored photo was physically deleted
+    """
+    hdfs_path = trip.get("photo_hdfs_path")
+    if not hdfs_path:
+        return False
+    
+    if blob_service.is_blob_path(hdfs_path):
+        if not await blob_service.release(trip["photo_sha256"], hdfs_path):
+            return False
+    
+    if "renditions" in trip:
+        derived_paths = [
+            thumbnail_service.rendition_path(hdfs_path, key)
+            for key in thumbnail_service.rendition_keys()
+        ]
+    else:
+        derived_paths = [hdfs_path.replace("/original/", "/thumbnails/")]
+    
+    for path in [hdfs_path, *derived_paths]:
+        await photo_cache.invalidate(path)
+        await storage.delete(path)
+    return True
+
+@router.get("/map/clusters")
+async def get_map_clusters(
+    west: float = Query(..., ge=-180, le=180),
+    south: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    zoom: int = Query(..., ge=0, le=22)
+):
+    """Clustered trip markers inside a map viewport; west > east crosses the antimeridian"""
+    if south >= north:
+        raise HTTPException(status_code=400, detail="south must be less than north")
+    try:
+        return await geo_service.clusters((west, south, east, north), zoom)
     except Exception as e:
-        logger.error(f"Failed to create analytics log: {str(e)}")
+        logger.error(f"Failed to cluster map trips: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve map clusters")
+
+@router.get("/map/trips")
+async def get_map_trips(
+    west: float = Query(..., ge=-180, le=180),
+    south: float = Query(..., ge=-90, le=90),
+    east: float = Query(..., ge=-180, le=180),
+    north: float = Query(..., ge=-90, le=90),
+    limit: int = Query(100, ge=1, le=500)
+):
+    """Individual trips inside a map viewport, for zoomed-in views"""
+    if south >= north:
+        raise HTTPException(status_code=400, detail="south must be less than north")
+    try:
+        return FastJSONResponse({"trips": await geo_service.trips_in((west, south, east, north), limit)})
+    except Exception as e:
+        logger.error(f"Failed to get map trips: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve map trips")
+
+@router.post("/map/rebuild")
+async def rebuild_map(current_user: dict = Depends(get_current_user)):
+    if not current_user.get("isAdmin"):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return await geo_service.backfill()
+
+@router.get("/stats/countries")
+async def get_country_stats(limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE)):
+    """Countries with the most trips"""
+    return {"countries": await rollup_service.top_countries(limit)}
+
+@router.get("/stats/places")
+async def get_place_stats(limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE)):
+    """Most visited places"""
+    return {"places": await rollup_service.top_places(limit)}
+
+@router.get("/stats/daily")
+async def get_daily_stats(days: int = Query(30, ge=1, le=366)):
+    """Trips uploaded per day, oldest first"""
+    return {"days": await rollup_service.daily(days)}
+
+@router.get("/stats/monthly")
+async def get_monthly_stats(months: int = Query(12, ge=1, le=12)):
+    """Trips uploaded per month, oldest first"""
+    return {"months": await rollup_service.monthly(months)}
+
+@router.post("/stats/rebuild")
+async def rebuild_trip_stats(current_user: dict = Depends(get_current_user)):
+    if not current_user.get("isAdmin"):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return await rollup_service.rebuild()
+
+@router.get("/cache/stats")
+async def get_photo_cache_stats(current_user: dict = Depends(get_current_user)):
+    if not current_user.get("isAdmin"):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return photo_cache.stats()
+
+@router.get("/search/stats")
+async def get_search_stats(current_user: dict = Depends(get_current_user)):
+    if not current_user.get("isAdmin"):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return trip_search.stats()
+
+@router.get("/admission/stats")
+async def get_upload_admission_stats(current_user: dict = Depends(get_current_user)):
+    if not current_user.get("isAdmin"):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return upload_admission.stats()
+
+@router.get("/analytics/stats")
+async def get_analytics_stats(current_user: dict = Depends(get_current_user)):
+    if not current_user.get("isAdmin"):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return analytics_sink.stats()
 
 @router.get("/hdfs/stats")
 async def get_hdfs_stats(current_user: dict = Depends(get_current_user)):
     if not current_user.get("isAdmin"):
         raise HTTPException(status_code=403, detail="Admin access required")
-    return hdfs_service.get_hdfs_stats()
+    return await storage_stats.get_stats()
+
+@router.post("/hdfs/stats/reconcile")
+async def reconcile_hdfs_stats(current_user: dict = Depends(get_current_user)):
+    if not current_user.get("isAdmin"):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return {"drift": await storage_stats.reconcile()}
+
+@router.post("/hdfs/compact")
+async def compact_hdfs_segments(min_dead_ratio: float = 0.5, current_user: dict = Depends(get_current_user)):
+    if not current_user.get("isAdmin"):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    if storage.name != "hdfs":
+        raise HTTPException(status_code=400, detail="Segment compaction requires the HDFS storage backend")
+    return await storage.hdfs.segments.compact(min_dead_ratio=min_dead_ratio)
@@ -1,72 +1,134 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
 from app.db import get_database
+from app.services.analytics_service import analytics_sink
+from app.services.leaderboard_service import leaderboard_service
+from app.services.follow_service import follow_service
+from app.services.feed_service import feed_service
+from app.services.user_search import user_search
+from app.schemas.user_schema import UserCard, UserPage
+from app.utils.fast_json import FastJSONResponse
+from app.utils.user_views import USER_CARD_PROJECTION
 from bson import ObjectId
+from typing import List
 
 router = APIRouter()
 
-def serialize_user(user):
-    return {
-        "id": str(user["_id"]),
-        "username": user.get("username"),
-        "email": user.get("email"),
-        "profilePic": user.get("profilePic"),
-    }
+def mark_following(users: list, following_ids: set) -> list:
+    for user in users:
+        user["isFollowing"] = user["id"] in following_ids
+    return users
 
-@router.get("/leaderboard")
-async def leaderboard(user_id: str = Query(None)):
-    db = get_database()
-    users = await db["users"].find().to_list(length=None)
-    trips = await db["trips"].find().to_list(length=None)
+@router.get("/leaderboard", response_model=List[UserCard])
+async def leaderboard(
+    user_id: str = Query(None),
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    users = await leaderboard_service.top(limit=limit, offset=offset)
 
-    following_ids = []
-    if user_id:
-        follows = await db["follows"].find({"follower_id": user_id}).to_list(length=None)
-        following_ids = [f["following_id"] for f in follows]
+    following_ids = await follow_service.is_following(user_id, [u["id"] for u in users])
 
-    result = []
-    for user in users:
-        user_trips = [t for t in trips if t["user_id"] == str(user["_id"])]
-        countries = len(set([t["country"] for t in user_trips]))
-        result.append({
-            **serialize_user(user),
-            "countriesVisited": countries,
-            "isFollowing": str(user["_id"]) in following_ids
-        })
-    result.sort(key=lambda x: x["countriesVisited"], reverse=True)
-    return result
-
-@router.get("/friends")
-async def friends(email: str):
+    for position, user in enumerate(users):
+        user["rank"] = offset + position + 1
+    return FastJSONResponse(mark_following(users, following_ids))
+
+@router.get("/leaderboard/rank/{user_id}")
+async def leaderboard_rank(user_id: str):
+    if not ObjectId.is_valid(user_id):
+        raise HTTPException(status_code=404, detail="User not found")
+    rank = await leaderboard_service.rank(user_id)
+    if not rank:
+        raise HTTPException(status_code=404, detail="User not found")
+    return rank
+
+async def users_by_ids(ids: list) -> list:
+    """Fetch user cards for ids, keeping the order of ids"""
+    db = get_database()
+    object_ids = [ObjectId(i) for i in ids if ObjectId.is_valid(i)]
+    users = {u["id"]: u async for u in db["users"].find({"_id": {"$in": object_ids}}, USER_CARD_PROJECTION)}
+    return [users[i] for i in ids if i in users]
+
+@router.get("/friends", response_model=List[UserCard])
+async def friends(
+    email: str,
+    limit: int = Query(50, ge=1, le=100),
+    after: str = Query(None)
+):
+    """Other users, ordered by ID; pass the last `id` as `after` for the next page"""
     db = get_database()
-    user = await db["users"].find_one({"email": email})
+    user = await db["users"].find_one({"email": email}, {"_id": 1})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     user_id = str(user["_id"])
 
-    users = await db["users"].find().to_list(length=None)
-    follows = await db["follows"].find({"follower_id": user_id}).to_list(length=None)
-    trips = await db["trips"].find().to_list(length=None)
-
-    following_ids = [f["following_id"] for f in follows]
-    result = []
-    for u in users:
-        if str(u["_id"]) == user_id:
-            continue
-        user_trips = [t for t in trips if t["user_id"] == str(u["_id"])]
-        countries = len(set([t["country"] for t in user_trips]))
-        result.append({
-            **serialize_user(u),
-            "countriesVisited": countries,
-            "isFollowing": str(u["_id"]) in following_ids
-        })
-    return result
+    query = {"_id": {"$ne": user["_id"]}}
+    if after and ObjectId.is_valid(after):
+        query["_id"]["$gt"] = ObjectId(after)
+    users = await db["users"].find(query, USER_CARD_PROJECTION).sort("_id", 1).limit(limit).to_list(limit)
+
+    following_ids = await follow_service.is_following(user_id, [u["id"] for u in users])
+    return FastJSONResponse(mark_following(users, following_ids))
+
+@router.get("/search", response_model=List[UserCard])
+async def search_users(
+    q: str = Query(..., min_length=1, max_length=64),
+    viewer_id: str = Query(None),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Typeahead: users whose username starts with q (case-insensitive)"""
+    # Results may come from the shared cache, so copy before marking
+    users = [dict(u) for u in await user_search.search(q, limit=limit)]
+    following_ids = await follow_service.is_following(viewer_id, [u["id"] for u in users])
+    return FastJSONResponse(mark_following(users, following_ids))
 
 @router.post("/follow/{friend_id}")
-async def toggle_follow(friend_id: str, follower_id: str = Query(...)):
-    db = get_database()
-    exists = await db["follows"].find_one({"follower_id": follower_id, "following_id": friend_id})
-    if exists:
-        await db["follows"].delete_one({"_id": exists["_id"]})
-        return {"message": "Unfollowed"}
-    await db["follows"].insert_one({"follower_id": follower_id, "following_id": friend_id})
-    return {"message": "Followed"}
+async def toggle_follow(friend_id: str, background_tasks: BackgroundTasks, follower_id: str = Query(...)):
+    if not ObjectId.is_valid(friend_id) or not ObjectId.is_valid(follower_id):
+        raise HTTPException(status_code=400, detail="Invalid user ID")
+    if friend_id == follower_id:
+        raise HTTPException(status_code=400, detail="Users cannot follow themselves")
+
+    if await follow_service.toggle(follower_id, friend_id):
+        background_tasks.add_task(feed_service.on_follow, follower_id, friend_id)
+        analytics_sink.emit("follow", follower_id=follower_id, following_id=friend_id)
+        return {"message": "Followed"}
+    background_tasks.add_task(feed_service.on_unfollow, follower_id, friend_id)
+    analytics_sink.emit("unfollow", follower_id=follower_id, following_id=friend_id)
+    return {"message": "Unfollowed"}
+
+@router.get("/follow/status")
+async def follow_status(follower_id: str = Query(...), ids: str = Query(...)):
+    """Batch check which of a comma-separated list of user IDs follower_id follows"""
+    user_ids = [i for i in ids.split(",") if i][:100]
+    following_ids = await follow_service.is_following(follower_id, user_ids)
+    return {user_id: user_id in following_ids for user_id in user_ids}
+
+@router.get("/{user_id}/followers", response_model=UserPage)
+async def list_followers(
+    user_id: str,
+    viewer_id: str = Query(None),
+    limit: int = Query(50, ge=1, le=100),
+    after: str = Query(None)
+):
+    ids = await follow_service.followers(user_id, limit=limit, after=after)
+    users = await users_by_ids(ids)
+    following_ids = await follow_service.is_following(viewer_id, ids)
+    return FastJSONResponse({
+        "users": mark_following(users, following_ids),
+        "next": ids[-1] if len(ids) == limit else None
+    })
+
+@router.get("/{user_id}/following", response_model=UserPage)
+async def list_following(
+    user_id: str,
+    viewer_id: str = Query(None),
+    limit: int = Query(50, ge=1, le=100),
+    after: str = Query(None)
+):
+    ids = await follow_service.following(user_id, limit=limit, after=after)
+    users = await users_by_ids(ids)
+    following_ids = await follow_service.is_following(viewer_id, ids)
+    return FastJSONResponse({
+        "users": mark_following(users, following_ids),
+        "next": ids[-1] if len(ids) == limit else None
+    })
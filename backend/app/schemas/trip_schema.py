@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
 
@@ -23,3 +23,23 @@ class TripOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+class TripSummaryOut(BaseModel):
+    id: str = Field(..., alias="_id")
+    user_id: Optional[str] = None
+    username: Optional[str] = None
+    country: Optional[str] = None
+    place_name: Optional[str] = None
+    description: Optional[str] = None
+    created_at: Optional[datetime] = None
+    photo_url: str
+    thumbnail_url: str
+
+    class Config:
+        populate_by_name = True
+        # view=full adds the remaining trip fields
+        extra = "allow"
+
+class TripPage(BaseModel):
+    trips: List[TripSummaryOut]
+    next_cursor: Optional[str] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class UserCreate(BaseModel):
@@ -24,3 +24,25 @@ class UserOut(BaseModel):
 
     class Config:
         orm_mode = True
+
+class UserCard(BaseModel):
+    id: str
+    username: Optional[str] = None
+    email: Optional[str] = None
+    profilePic: Optional[str] = None
+    countriesVisited: int = 0
+    followersCount: Optional[int] = None
+    followingCount: Optional[int] = None
+    isFollowing: bool = False
+    rank: Optional[int] = None
+
+class UserPage(BaseModel):
+    users: List[UserCard]
+    next: Optional[str] = None
+
+class AdminUserOut(BaseModel):
+    id: str
+    username: Optional[str] = None
+    email: Optional[str] = None
+    travel_style: Optional[str] = None
+    isAdmin: bool = False
@@ -0,0 +1,170 @@
+# backend/app/services/analytics_service.py
+import os
+import gzip
+import json
+import uuid
+import socket
+import asyncio
+import logging
+from collections import deque
+from datetime import datetime
+from typing import Optional
+from app.services.storage_backend import storage
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+class AnalyticsSink:
+    """
+    Buffers analytics events in process and writes them to storage in batches
+
+    Events go into a bounded in-memory buffer. A background task flushes it
+    every few seconds (or sooner once enough events are queued), appending
+    NDJSON to one segment file per process that rolls every hour or when it
+    grows past a size threshold. When storage is slow or down the buffer fills
+    up and new events are dropped and counted instead of piling up memory.
+    """
+
+    def __init__(self):
+        self.max_buffer = int(os.getenv("ANALYTICS_BUFFER_EVENTS", "10000"))
+        self.flush_events = int(os.getenv("ANALYTICS_FLUSH_EVENTS", "500"))
+        self.flush_interval = float(os.getenv("ANALYTICS_FLUSH_SECONDS", "5"))
+        self.segment_max = int(os.getenv("ANALYTICS_SEGMENT_MB", "64")) * MB
+        self.compress = os.getenv("ANALYTICS_GZIP", "false").lower() == "true"
+
+        self._buffer: deque = deque()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._backoff = 0.0
+
+        self._segment_path: Optional[str] = None
+        self._segment_hour: Optional[str] = None
+        self._segment_size = 0
+
+        self.metrics = {
+            "emitted": 0,
+            "written": 0,
+            "dropped": 0,
+            "flushes": 0,
+            "flush_failures": 0,
+            "segments": 0,
+        }
+
+    def emit(self, action: str, **fields) -> bool:
+        """Queue an event without blocking; returns False if it had to be dropped"""
+        if len(self._buffer) >= self.max_buffer:
+            self.metrics["dropped"] += 1
+            return False
+
+        self._buffer.append({
+            "action": action,
+            "timestamp": datetime.utcnow().isoformat(),
+            **fields
+        })
+        self.metrics["emitted"] += 1
+        if self._wakeup and len(self._buffer) >= self.flush_events:
+            self._wakeup.set()
+        return True
+
+    async def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._lock = asyncio.Lock()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write out whatever is still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._backoff = 0.0
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval + self._backoff)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            while self._buffer:
+                batch = [self._buffer.popleft() for _ in range(min(len(self._buffer), self.flush_events * 4))]
+                payload = "".join(json.dumps(event, default=str) + "\n" for event in batch).encode("utf-8")
+                if self.compress:
+                    # Concatenated gzip members still form a valid gzip file
+                    payload = gzip.compress(payload)
+
+                try:
+                    await self._write(payload)
+                except Exception as e:
+                    self.metrics["flush_failures"] += 1
+                    self._backoff = min(max(self._backoff * 2, 1.0), 60.0)
+                    self._requeue(batch)
+                    # A half-written append may have left a partial line; start fresh
+                    self._segment_path = None
+                    logger.warning(f"Analytics flush failed, retrying in {self._backoff}s: {str(e)}")
+                    return
+
+                self._backoff = 0.0
+                self.metrics["flushes"] += 1
+                self.metrics["written"] += len(batch)
+
+    def _requeue(self, batch: list):
+        """Put a failed batch back in front, dropping the oldest events that no longer fit"""
+        room = self.max_buffer - len(self._buffer)
+        if room < len(batch):
+            self.metrics["dropped"] += len(batch) - max(room, 0)
+            batch = batch[len(batch) - max(room, 0):]
+        self._buffer.extendleft(reversed(batch))
+
+    async def _write(self, payload: bytes):
+        if not storage.available():
+            raise RuntimeError(f"{storage.name} storage not available")
+
+        now = datetime.utcnow()
+        hour = now.strftime("%Y%m%d%H")
+        if (
+            self._segment_path is None
+            or self._segment_hour != hour
+            or self._segment_size >= self.segment_max
+        ):
+            extension = "ndjson.gz" if self.compress else "ndjson"
+            path = (
+                f"{storage.base_path}/analytics/{now.strftime('%Y/%m/%d')}/"
+                f"{now.strftime('%H')}-{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}.{extension}"
+            )
+            await storage.write_bytes(path, payload)
+            self._segment_path = path
+            self._segment_hour = hour
+            self._segment_size = len(payload)
+            self.metrics["segments"] += 1
+            return
+
+        await storage.append(self._segment_path, payload)
+        self._segment_size += len(payload)
+
+    def stats(self) -> dict:
+        return {
+            **self.metrics,
+            "buffered": len(self._buffer),
+            "buffer_capacity": self.max_buffer,
+            "current_segment": self._segment_path,
+            "current_segment_bytes": self._segment_size,
+        }
+
+
+analytics_sink = AnalyticsSink()
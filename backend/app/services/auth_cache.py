@@ -0,0 +1,141 @@
+# backend/app/services/auth_cache.py
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Optional
+from app.db import get_database
+
+logger = logging.getLogger(__name__)
+
+# The only user fields request handlers read from current_user; the
+# password hash is deliberately never cached
+AUTH_FIELDS = ("email", "username", "isAdmin")
+AUTH_PROJECTION = {field: 1 for field in AUTH_FIELDS}
+
+
+class AuthCache:
+    """
+    Bounded TTL + LRU cache from bearer token to the authenticated user
+
+    A hit skips both JWT verification (the exact token string was verified
+    when it was cached) and the users lookup. Entries never outlive the
+    token's own expiry. Code that changes or deletes a user calls
+    invalidate_user(); changes made by other processes are picked up from
+    a users change stream when the deployment supports one (the stream is
+    retried with backoff if it fails or is unavailable), and otherwise
+    within AUTH_CACHE_SECONDS.
+    """
+
+    def __init__(self):
+        self.ttl = float(os.getenv("AUTH_CACHE_SECONDS", "60"))
+        self.max_entries = int(os.getenv("AUTH_CACHE_ENTRIES", "10000"))
+        self.watch_changes = os.getenv("AUTH_CACHE_CHANGE_STREAM", "true").lower() == "true"
+        self.watch_retry_max = float(os.getenv("AUTH_CACHE_WATCH_RETRY_MAX_SECONDS", "300"))
+        self._entries: OrderedDict = OrderedDict()
+        self._tokens_by_user: dict = {}
+        self._task: Optional[asyncio.Task] = None
+        self.metrics = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    def get(self, token: str) -> Optional[dict]:
+        entry = self._entries.get(token)
+        if entry is None:
+            self.metrics["misses"] += 1
+            return None
+        expires_at, user = entry
+        if expires_at <= time.monotonic():
+            self._remove(token)
+            self.metrics["misses"] += 1
+            return None
+        self._entries.move_to_end(token)
+        self.metrics["hits"] += 1
+        return dict(user)
+
+    def put(self, token: str, user: dict, token_expires: Optional[float] = None):
+        """Cache a user for a token; token_expires is the JWT exp as a Unix timestamp"""
+        ttl = self.ttl
+        if token_expires is not None:
+            ttl = min(ttl, token_expires - time.time())
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+
+        self._remove(token)
+        user_id = str(user["_id"])
+        self._entries[token] = (time.monotonic() + ttl, user)
+        self._tokens_by_user.setdefault(user_id, set()).add(token)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.metrics["evictions"] += 1
+
+    def _remove(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_id = str(entry[1]["_id"])
+        tokens = self._tokens_by_user.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[user_id]
+
+    def invalidate_user(self, user_id):
+        """Drop every cached token of a user whose document changed"""
+        for token in list(self._tokens_by_user.get(str(user_id), ())):
+            self._remove(token)
+            self.metrics["invalidations"] += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._tokens_by_user.clear()
+
+    async def _watch(self):
+        db = get_database()
+        pipeline = [{"$match": {"operationType": {"$in": ["update", "replace", "delete"]}}}]
+        delay = 1.0
+        while True:
+            try:
+                async with db["users"].watch(pipeline) as stream:
+                    delay = 1.0
+                    async for change in stream:
+                        if change["operationType"] == "update":
+                            changed = change.get("updateDescription", {})
+                            fields = {*changed.get("updatedFields", {}), *changed.get("removedFields", [])}
+                            # Counter updates (countries, follows) don't affect auth
+                            if not fields.intersection(AUTH_FIELDS):
+                                continue
+                        self.invalidate_user(change["documentKey"]["_id"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Standalone servers have no change streams; the TTL bounds
+                # staleness until a retry succeeds
+                logger.warning(f"Auth cache change stream unavailable, retrying in {delay:.0f}s: {str(e)}")
+                # Changes may have been missed while the stream was down
+                self.clear()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.watch_retry_max)
+
+    async def start(self):
+        if self._task is None and self.watch_changes:
+            self._task = asyncio.create_task(self._watch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.clear()
+
+    def stats(self) -> dict:
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "hit_rate": round(self.metrics["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+        }
+
+
+auth_cache = AuthCache()
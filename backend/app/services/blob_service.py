@@ -0,0 +1,126 @@
+# backend/app/services/blob_service.py
+import uuid
+import asyncio
+import logging
+from datetime import datetime
+from typing import BinaryIO
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.db import get_database
+from app.services.storage_backend import storage
+from app.utils.upload_utils import inspect_upload
+
+logger = logging.getLogger(__name__)
+
+
+class BlobService:
+    """
+    Content-addressed photo storage with reference counting
+
+    Each distinct photo (by SHA-256) is stored once in storage and tracked in
+    the photo_blobs collection. Trips referencing the same bytes share the
+    blob; it is only deleted physically once the last reference is gone.
+
+    A blob is only ever re-referenced while its refcount is above zero, so
+    once a release drops it to zero that file is safe to delete even if
+    the same content is uploaded again concurrently (it gets a new path).
+    """
+
+    collection = "photo_blobs"
+
+    async def _acquire_live(self, sha256: str):
+        db = get_database()
+        return await db[self.collection].find_one_and_update(
+            {"_id": sha256, "refcount": {"$gt": 0}},
+            {"$inc": {"refcount": 1}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def store(self, source: BinaryIO, max_size: int) -> dict:
+        """
+        Store an upload, reusing an existing blob when the content is known
+
+        Returns:
+            Dict with hdfs_path, size, sha256, content_type and deduplicated
+        """
+        db = get_database()
+        # Local spool I/O only, so nothing reaches storage for a duplicate
+        upload = await asyncio.to_thread(inspect_upload, source, max_size)
+        sha256 = upload["sha256"]
+
+        blob = await self._acquire_live(sha256)
+        if blob:
+            logger.info(f"Deduplicated upload {sha256} -> {blob['path']}")
+            return {**upload, "hdfs_path": blob["path"], "deduplicated": True}
+
+        path = self.blob_path(sha256)
+        await storage.write_stream(path, source, max_size)
+
+        blob_doc = {
+            "_id": sha256,
+            "path": path,
+            "refcount": 1,
+            "size": upload["size"],
+            "content_type": upload["content_type"],
+            "created_at": datetime.utcnow()
+        }
+        try:
+            await db[self.collection].insert_one(blob_doc)
+            return {**upload, "hdfs_path": path, "deduplicated": False}
+        except DuplicateKeyError:
+            pass
+
+        # Someone stored the same content while we were writing. The entry
+        # can flip between live and released under us, so settle it in a
+        # loop: either reference the live blob or take a released one over.
+        while True:
+            blob = await self._acquire_live(sha256)
+            if blob:
+                await storage.delete(path)
+                return {**upload, "hdfs_path": blob["path"], "deduplicated": True}
+
+            try:
+                await db[self.collection].find_one_and_update(
+                    {"_id": sha256, "refcount": {"$lte": 0}},
+                    {"$set": {k: v for k, v in blob_doc.items() if k != "_id"}},
+                    upsert=True
+                )
+                return {**upload, "hdfs_path": path, "deduplicated": False}
+            except DuplicateKeyError:
+                # Revived by another upload between the two steps
+                continue
+
+    async def release(self, sha256: str, path: str) -> bool:
+        """
+        Drop one reference to a blob
+
+        Returns:
+            True when the caller held the last reference and must delete
+            the stored file (and its derived renditions)
+        """
+        db = get_database()
+        blob = await db[self.collection].find_one_and_update(
+            {"_id": sha256, "path": path, "refcount": {"$gt": 0}},
+            {"$inc": {"refcount": -1}},
+            return_document=ReturnDocument.AFTER
+        )
+        if blob is None:
+            logger.warning(f"Release of unknown blob {sha256} at {path}")
+            return False
+        if blob["refcount"] > 0:
+            return False
+
+        await db[self.collection].delete_one({"_id": sha256, "path": path, "refcount": {"$lte": 0}})
+        return True
+
+    @staticmethod
+    def blob_path(sha256: str) -> str:
+        # The suffix keeps a re-created blob from reusing a path being deleted
+        return f"{storage.base_path}/photos/original/cas/{sha256[:2]}/{sha256}-{uuid.uuid4().hex[:8]}"
+
+    @staticmethod
+    def is_blob_path(hdfs_path: str) -> bool:
+        return "/photos/original/cas/" in hdfs_path
+
+
+blob_service = BlobService()
@@ -0,0 +1,159 @@
+# backend/app/services/feed_service.py
+import os
+import time
+import logging
+from typing import Optional
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from app.db import get_database
+from app.services.follow_service import follow_service
+from app.utils.pagination import KEYSET_SORT, encode_cursor, keyset_filter
+from app.utils.trip_views import trip_summary, trip_summary_projection
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 100
+
+
+class FeedService:
+    """
+    Home feed of followed users' trips
+
+    Uploads are fanned out on write into `timelines`: one small document
+    per (reader, trip) with the trip summary embedded, so reading a feed is
+    one indexed range scan on (owner_id, created_at, trip_id).
+
+    Accounts with more than FEED_FANOUT_MAX_FOLLOWERS followers are not
+    fanned out; their trips are pulled from `trips` at read time for the
+    readers following them and merged into the page.
+    """
+
+    collection = "timelines"
+
+    def __init__(self):
+        self.fanout_max_followers = int(os.getenv("FEED_FANOUT_MAX_FOLLOWERS", "10000"))
+        self.backfill_trips = int(os.getenv("FEED_FOLLOW_BACKFILL", "20"))
+        self.celebrity_refresh = float(os.getenv("FEED_CELEBRITY_REFRESH_SECONDS", "300"))
+        self._celebrities: set = set()
+        self._celebrities_loaded_at = 0.0
+
+    def _entry(self, owner_id: str, trip: dict) -> dict:
+        return {
+            "owner_id": owner_id,
+            "author_id": trip["user_id"],
+            "trip_id": trip["_id"],
+            "created_at": trip["created_at"],
+            "trip": trip_summary(trip),
+        }
+
+    async def _insert(self, entries: list):
+        if not entries:
+            return
+        db = get_database()
+        try:
+            await db[self.collection].insert_many(entries, ordered=False)
+        except BulkWriteError as e:
+            # Entries already delivered (e.g. a retried fan-out) are fine
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+
+    async def _is_celebrity(self, user_id: str) -> bool:
+        db = get_database()
+        user = await db["users"].find_one({"_id": ObjectId(user_id)}, {"followers_count": 1})
+        return bool(user) and user.get("followers_count", 0) > self.fanout_max_followers
+
+    async def fan_out(self, trip: dict):
+        """Deliver a new trip to its author's and followers' timelines"""
+        author_id = trip["user_id"]
+        try:
+            await self._insert([self._entry(author_id, trip)])
+            if await self._is_celebrity(author_id):
+                return
+
+            delivered = 0
+            after = None
+            while True:
+                followers = await follow_service.followers(author_id, limit=MAX_PAGE_SIZE, after=after)
+                await self._insert([self._entry(follower_id, trip) for follower_id in followers])
+                delivered += len(followers)
+                if len(followers) < MAX_PAGE_SIZE:
+                    break
+                after = followers[-1]
+            logger.info(f"Fanned out trip {trip['_id']} to {delivered} followers")
+        except Exception as e:
+            logger.error(f"Feed fan-out failed for trip {trip.get('_id')}: {str(e)}")
+
+    async def remove_trip(self, trip_id: ObjectId):
+        db = get_database()
+        await db[self.collection].delete_many({"trip_id": trip_id})
+
+    async def on_follow(self, follower_id: str, following_id: str):
+        """Backfill a few recent trips so a new follow shows up in the feed right away"""
+        if await self._is_celebrity(following_id):
+            return
+        db = get_database()
+        trips = await (
+            db["trips"]
+            .find({"user_id": following_id})
+            .sort(KEYSET_SORT)
+            .limit(self.backfill_trips)
+            .to_list(self.backfill_trips)
+        )
+        await self._insert([self._entry(follower_id, trip) for trip in trips])
+
+    async def on_unfollow(self, follower_id: str, following_id: str):
+        db = get_database()
+        await db[self.collection].delete_many({"owner_id": follower_id, "author_id": following_id})
+
+    async def celebrities(self) -> set:
+        """IDs of accounts served by the pull path, refreshed periodically"""
+        if time.monotonic() - self._celebrities_loaded_at > self.celebrity_refresh:
+            db = get_database()
+            cursor = db["users"].find(
+                {"followers_count": {"$gt": self.fanout_max_followers}}, {"_id": 1}
+            )
+            self._celebrities = {str(user["_id"]) async for user in cursor}
+            self._celebrities_loaded_at = time.monotonic()
+        return self._celebrities
+
+    async def feed(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> dict:
+        """
+        One page of a user's feed, newest first
+
+        Returns:
+            Dict with trips and next_cursor (None on the last page)
+        """
+        db = get_database()
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        pushed = (
+            db[self.collection]
+            .find({"owner_id": user_id, **keyset_filter(cursor, "trip_id")}, {"_id": 0, "trip": 1})
+            .sort([("created_at", -1), ("trip_id", -1)])
+            .limit(limit)
+        )
+        trips = [entry["trip"] async for entry in pushed]
+
+        celebrities = await self.celebrities()
+        followed = list(await follow_service.is_following(user_id, list(celebrities))) if celebrities else []
+        if followed:
+            pipeline = [
+                {"$match": {"user_id": {"$in": followed}, **keyset_filter(cursor)}},
+                {"$sort": dict(KEYSET_SORT)},
+                {"$limit": limit},
+                {"$project": trip_summary_projection()},
+            ]
+            seen = {trip["_id"] for trip in trips}
+            async for trip in db["trips"].aggregate(pipeline):
+                if trip["_id"] not in seen:
+                    trips.append(trip)
+            trips.sort(key=lambda trip: (trip["created_at"], ObjectId(trip["_id"])), reverse=True)
+            trips = trips[:limit]
+
+        next_cursor = None
+        if len(trips) == limit:
+            next_cursor = encode_cursor(trips[-1]["created_at"], trips[-1]["_id"])
+        return {"trips": trips, "next_cursor": next_cursor}
+
+
+feed_service = FeedService()
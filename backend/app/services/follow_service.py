@@ -0,0 +1,151 @@
+# backend/app/services/follow_service.py
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from app.db import get_database
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 100
+
+
+class FollowService:
+    """
+    Follow graph stored as one edge document per (follower, following) pair
+
+    A unique compound index makes follow an atomic insert and unfollow an
+    atomic delete, with no read-modify-write of user documents. Each edge
+    change adjusts followers_count/following_count on both users. Listing
+    and membership checks only project indexed fields, so they are served
+    from the index without fetching edge documents.
+    """
+
+    collection = "follows"
+
+    async def _adjust_counts(self, follower_id: str, following_id: str, delta: int):
+        db = get_database()
+        await db["users"].update_one({"_id": ObjectId(follower_id)}, {"$inc": {"following_count": delta}})
+        await db["users"].update_one({"_id": ObjectId(following_id)}, {"$inc": {"followers_count": delta}})
+
+    async def follow(self, follower_id: str, following_id: str) -> bool:
+        """Create the edge; returns False if it already existed"""
+        db = get_database()
+        try:
+            await db[self.collection].insert_one({
+                "follower_id": follower_id,
+                "following_id": following_id,
+                "created_at": datetime.utcnow()
+            })
+        except DuplicateKeyError:
+            return False
+        await self._adjust_counts(follower_id, following_id, 1)
+        return True
+
+    async def unfollow(self, follower_id: str, following_id: str) -> bool:
+        """Delete the edge; returns False if there was nothing to delete"""
+        db = get_database()
+        result = await db[self.collection].delete_one(
+            {"follower_id": follower_id, "following_id": following_id}
+        )
+        if result.deleted_count == 0:
+            return False
+        await self._adjust_counts(follower_id, following_id, -1)
+        return True
+
+    async def toggle(self, follower_id: str, following_id: str) -> bool:
+        """Flip the edge and return whether follower_id now follows following_id"""
+        if await self.unfollow(follower_id, following_id):
+            return False
+        await self.follow(follower_id, following_id)
+        return True
+
+    async def is_following(self, follower_id: str, ids: list) -> set:
+        """Subset of ids that follower_id follows"""
+        if not follower_id or not ids:
+            return set()
+        db = get_database()
+        cursor = db[self.collection].find(
+            {"follower_id": follower_id, "following_id": {"$in": list(ids)}},
+            {"_id": 0, "following_id": 1}
+        )
+        return {edge["following_id"] async for edge in cursor}
+
+    async def _page(self, key: str, user_id: str, other: str, limit: int, after: Optional[str]) -> list:
+        db = get_database()
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query = {key: user_id}
+        if after:
+            query[other] = {"$gt": after}
+        cursor = (
+            db[self.collection]
+            .find(query, {"_id": 0, other: 1})
+            .sort(other, 1)
+            .limit(limit)
+        )
+        return [edge[other] async for edge in cursor]
+
+    async def following(self, user_id: str, limit: int = 50, after: Optional[str] = None) -> list:
+        """IDs user_id follows, ordered by ID; pass the last one as `after` for the next page"""
+        return await self._page("follower_id", user_id, "following_id", limit, after)
+
+    async def followers(self, user_id: str, limit: int = 50, after: Optional[str] = None) -> list:
+        """IDs following user_id, ordered by ID; pass the last one as `after` for the next page"""
+        return await self._page("following_id", user_id, "follower_id", limit, after)
+
+    async def migrate_embedded(self) -> dict:
+        """Move legacy `following` arrays on user documents into edges"""
+        db = get_database()
+        report = {"users": 0, "edges": 0}
+        async for user in db["users"].find({"following": {"$exists": True}}, {"following": 1}):
+            follower_id = str(user["_id"])
+            for following_id in {str(fid) for fid in user.get("following") or []}:
+                if following_id == follower_id or not ObjectId.is_valid(following_id):
+                    continue
+                await db[self.collection].update_one(
+                    {"follower_id": follower_id, "following_id": following_id},
+                    {"$setOnInsert": {"created_at": datetime.utcnow()}},
+                    upsert=True
+                )
+                report["edges"] += 1
+            await db["users"].update_one({"_id": user["_id"]}, {"$unset": {"following": ""}})
+            report["users"] += 1
+        return report
+
+    async def rebuild_counts(self) -> int:
+        """Recompute followers_count/following_count for every user from the edges"""
+        db = get_database()
+        counts = {}
+        for key, field in (("follower_id", "following_count"), ("following_id", "followers_count")):
+            async for row in db[self.collection].aggregate([{"$group": {"_id": f"${key}", "n": {"$sum": 1}}}]):
+                counts.setdefault(row["_id"], {})[field] = row["n"]
+
+        ops = []
+        async for user in db["users"].find({}, {"followers_count": 1, "following_count": 1}):
+            user_counts = counts.get(str(user["_id"]), {})
+            update = {
+                "followers_count": user_counts.get("followers_count", 0),
+                "following_count": user_counts.get("following_count", 0)
+            }
+            if any(user.get(field) != value for field, value in update.items()):
+                ops.append(UpdateOne({"_id": user["_id"]}, {"$set": update}))
+        if ops:
+            await db["users"].bulk_write(ops, ordered=False)
+        return len(ops)
+
+
+follow_service = FollowService()
+
+
+if __name__ == "__main__":
+    from app.db import init_db
+
+    async def main():
+        await init_db()
+        print(await follow_service.migrate_embedded())
+        print({"users_corrected": await follow_service.rebuild_counts()})
+
+    asyncio.run(main())
@@ -0,0 +1,286 @@
+# backend/app/services/geo_service.py
+import os
+import csv
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional, Tuple
+from pymongo import UpdateOne
+from app.db import get_database
+from app.utils.geo import MAX_PRECISION, bbox_polygons, geohash, point, valid_coordinates, zoom_precision
+from app.utils.trip_views import trip_summary_projection
+
+logger = logging.getLogger(__name__)
+
+MAX_CLUSTERS = 500
+MAX_MAP_TRIPS = 500
+
+# Approximate centroids used when neither EXIF nor the gazetteer knows the place
+COUNTRY_CENTROIDS = {
+    "argentina": (-38.4, -63.6), "australia": (-25.3, 133.8), "austria": (47.5, 14.6),
+    "belgium": (50.5, 4.5), "brazil": (-14.2, -51.9), "canada": (56.1, -106.3),
+    "chile": (-35.7, -71.5), "china": (35.9, 104.2), "colombia": (4.6, -74.3),
+    "croatia": (45.1, 15.2), "czech republic": (49.8, 15.5), "denmark": (56.3, 9.5),
+    "egypt": (26.8, 30.8), "finland": (61.9, 25.7), "france": (46.2, 2.2),
+    "germany": (51.2, 10.5), "greece": (39.1, 21.8), "hungary": (47.2, 19.5),
+    "iceland": (64.9, -19.0), "india": (20.6, 79.0), "indonesia": (-0.8, 113.9),
+    "iran": (32.4, 53.7), "ireland": (53.4, -8.2), "israel": (31.0, 34.9),
+    "italy": (41.9, 12.6), "japan": (36.2, 138.3), "jordan": (30.6, 36.2),
+    "kenya": (-0.0, 37.9), "malaysia": (4.2, 102.0), "maldives": (3.2, 73.2),
+    "mexico": (23.6, -102.6), "morocco": (31.8, -7.1), "nepal": (28.4, 84.1),
+    "netherlands": (52.1, 5.3), "new zealand": (-40.9, 174.9), "norway": (60.5, 8.5),
+    "pakistan": (30.4, 69.3), "peru": (-9.2, -75.0), "philippines": (12.9, 121.8),
+    "poland": (51.9, 19.1), "portugal": (39.4, -8.2), "qatar": (25.4, 51.2),
+    "russia": (61.5, 105.3), "saudi arabia": (23.9, 45.1), "singapore": (1.35, 103.8),
+    "south africa": (-30.6, 22.9), "south korea": (35.9, 127.8), "spain": (40.5, -3.7),
+    "sri lanka": (7.9, 80.8), "sweden": (60.1, 18.6), "switzerland": (46.8, 8.2),
+    "thailand": (15.9, 101.0), "turkey": (39.0, 35.2), "united arab emirates": (23.4, 53.8),
+    "united kingdom": (55.4, -3.4), "united states": (37.1, -95.7), "vietnam": (14.1, 108.3),
+}
+COUNTRY_ALIASES = {
+    "usa": "united states", "us": "united states", "united states of america": "united states",
+    "uk": "united kingdom", "england": "united kingdom", "scotland": "united kingdom",
+    "uae": "united arab emirates", "korea": "south korea", "czechia": "czech republic",
+    "türkiye": "turkey", "holland": "netherlands",
+}
+
+
+def normalize(value: str) -> str:
+    return (value or "").strip().lower()
+
+
+def country_name(country: str) -> str:
+    name = normalize(country)
+    return COUNTRY_ALIASES.get(name, name)
+
+
+class GeoService:
+    """
+    Trip coordinates and server-side map clustering
+
+    Each trip gets a GeoJSON `location` from its photo's EXIF GPS data, or
+    else from an offline gazetteer (GAZETTEER_PATH, a CSV of name, country,
+    lat, lon) falling back to country centroids. `geo_cells` keeps one
+    counter per geohash cell at every precision up to MAX_PRECISION with
+    the centroid of its trips, so a map viewport at any zoom is one indexed
+    query over a bounded number of cells instead of over the trips.
+    """
+
+    collection = "geo_cells"
+
+    def __init__(self):
+        self.gazetteer_path = os.getenv("GAZETTEER_PATH")
+        self._places: Optional[dict] = None
+
+    def _load_gazetteer(self) -> dict:
+        if self._places is None:
+            self._places = {}
+            if self.gazetteer_path:
+                try:
+                    with open(self.gazetteer_path, newline="", encoding="utf-8") as handle:
+                        for row in csv.DictReader(handle):
+                            key = (country_name(row["country"]), normalize(row["name"]))
+                            self._places.setdefault(key, (float(row["lat"]), float(row["lon"])))
+                    logger.info(f"Loaded {len(self._places)} gazetteer places")
+                except Exception as e:
+                    logger.error(f"Failed to load gazetteer {self.gazetteer_path}: {str(e)}")
+        return self._places
+
+    def lookup(self, country: str, place_name: str) -> Tuple[Optional[Tuple[float, float]], Optional[str]]:
+        """(coordinates, source) for a place from the gazetteer or country centroids"""
+        country = country_name(country)
+        coordinates = self._load_gazetteer().get((country, normalize(place_name)))
+        if coordinates:
+            return coordinates, "gazetteer"
+        coordinates = COUNTRY_CENTROIDS.get(country)
+        if coordinates:
+            return coordinates, "country"
+        return None, None
+
+    def locate(self, country: str, place_name: str, gps: Optional[Tuple[float, float]] = None) -> dict:
+        """
+        Location fields to store on a trip
+
+        Returns:
+            Dict with location, location_source and geohash, or {} when the
+            place is unknown
+        """
+        source = "exif"
+        if not gps or not valid_coordinates(*gps):
+            gps, source = self.lookup(country, place_name)
+        if not gps:
+            return {}
+        lat, lon = gps
+        return {"location": point(lat, lon), "location_source": source, "geohash": geohash(lat, lon)}
+
+    def _cell_updates(self, trips: list, sign: int) -> list:
+        deltas = {}
+        for trip in trips:
+            if not trip.get("geohash"):
+                continue
+            lon, lat = trip["location"]["coordinates"]
+            for precision in range(1, MAX_PRECISION + 1):
+                delta = deltas.setdefault((precision, trip["geohash"][:precision]), [0, 0.0, 0.0])
+                delta[0] += sign
+                delta[1] += sign * lat
+                delta[2] += sign * lon
+
+        operations = []
+        for (precision, cell), (count, lat_sum, lon_sum) in deltas.items():
+            totals = {
+                "count": {"$add": [{"$ifNull": ["$count", 0]}, count]},
+                "lat_sum": {"$add": [{"$ifNull": ["$lat_sum", 0]}, lat_sum]},
+                "lon_sum": {"$add": [{"$ifNull": ["$lon_sum", 0]}, lon_sum]},
+            }
+            operations.append(UpdateOne(
+                {"precision": precision, "cell": cell},
+                [{"$set": {**totals, "updated_at": "$$NOW"}}, {"$set": {"center": self._center_expression()}}],
+                upsert=sign > 0
+            ))
+        return operations
+
+    @staticmethod
+    def _center_expression() -> dict:
+        count = {"$max": ["$count", 1]}
+        return {
+            "type": "Point",
+            "coordinates": [{"$divide": ["$lon_sum", count]}, {"$divide": ["$lat_sum", count]}],
+        }
+
+    async def record_trips(self, trips: list):
+        operations = self._cell_updates(trips, 1)
+        if not operations:
+            return
+        try:
+            db = get_database()
+            await db[self.collection].bulk_write(operations, ordered=False)
+        except Exception as e:
+            # Cells are repaired by the next rebuild
+            logger.error(f"Failed to record map cells: {str(e)}")
+
+    async def remove_trip(self, trip: dict):
+        operations = self._cell_updates([trip], -1)
+        if not operations:
+            return
+        try:
+            db = get_database()
+            await db[self.collection].bulk_write(operations, ordered=False)
+            # (precision, cell) pairs so the delete uses precision_cell_unique
+            await db[self.collection].delete_many({
+                "$or": [
+                    {"precision": precision, "cell": trip["geohash"][:precision]}
+                    for precision in range(1, MAX_PRECISION + 1)
+                ],
+                "count": {"$lte": 0}
+            })
+        except Exception as e:
+            logger.error(f"Failed to remove map cells: {str(e)}")
+
+    @staticmethod
+    def _within(field: str, bbox: tuple) -> dict:
+        polygons = bbox_polygons(*bbox)
+        clauses = [{field: {"$geoWithin": {"$geometry": polygon}}} for polygon in polygons]
+        return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+    async def clusters(self, bbox: tuple, zoom: int) -> dict:
+        """
+        Clustered markers inside a (west, south, east, north) box
+
+        Returns:
+            Dict with precision and clusters (geohash cell, trip count and
+            the centroid of its trips), largest clusters first
+        """
+        precision = zoom_precision(zoom)
+        db = get_database()
+        cursor = (
+            db[self.collection]
+            .find({"precision": precision, **self._within("center", bbox)},
+                  {"_id": 0, "cell": 1, "count": 1, "center": 1})
+            .sort("count", -1)
+            .limit(MAX_CLUSTERS)
+        )
+        clusters = [
+            {"cell": cell["cell"], "count": cell["count"],
+             "lat": cell["center"]["coordinates"][1], "lon": cell["center"]["coordinates"][0]}
+            async for cell in cursor if cell["count"] > 0
+        ]
+        return {"precision": precision, "clusters": clusters}
+
+    async def trips_in(self, bbox: tuple, limit: int = 100) -> list:
+        """Individual trips inside a box, for zoom levels where clusters break apart"""
+        db = get_database()
+        limit = max(1, min(limit, MAX_MAP_TRIPS))
+        cursor = db["trips"].find(
+            self._within("location", bbox),
+            {**trip_summary_projection(), "location": 1}
+        ).limit(limit)
+        return await cursor.to_list(limit)
+
+    async def backfill(self) -> dict:
+        """Locate trips stored without coordinates, then rebuild every cell"""
+        db = get_database()
+        located = 0
+        cursor = db["trips"].find(
+            {"location": {"$exists": False}}, {"country": 1, "place_name": 1}
+        ).batch_size(1000)
+        batch = []
+        async for trip in cursor:
+            fields = self.locate(trip.get("country"), trip.get("place_name"))
+            if fields:
+                batch.append(UpdateOne({"_id": trip["_id"]}, {"$set": fields}))
+            if len(batch) >= 1000:
+                located += (await db["trips"].bulk_write(batch, ordered=False)).modified_count
+                batch = []
+        if batch:
+            located += (await db["trips"].bulk_write(batch, ordered=False)).modified_count
+        return {"trips_located": located, **await self.rebuild()}
+
+    async def rebuild(self) -> dict:
+        """Recompute geo_cells from trip locations with one aggregation"""
+        db = get_database()
+        now = datetime.utcnow()
+        pipeline = [
+            {"$match": {"geohash": {"$type": "string"}}},
+            {"$project": {
+                "_id": 0,
+                "lat": {"$arrayElemAt": ["$location.coordinates", 1]},
+                "lon": {"$arrayElemAt": ["$location.coordinates", 0]},
+                "cells": {"$map": {
+                    "input": {"$range": [1, MAX_PRECISION + 1]},
+                    "as": "precision",
+                    "in": {"precision": "$$precision", "cell": {"$substrCP": ["$geohash", 0, "$$precision"]}}
+                }}
+            }},
+            {"$unwind": "$cells"},
+            {"$group": {
+                "_id": "$cells",
+                "count": {"$sum": 1},
+                "lat_sum": {"$sum": "$lat"},
+                "lon_sum": {"$sum": "$lon"}
+            }},
+            {"$project": {"_id": 0, "precision": "$_id.precision", "cell": "$_id.cell",
+                          "count": 1, "lat_sum": 1, "lon_sum": 1, "updated_at": {"$literal": now}}},
+            {"$set": {"center": self._center_expression()}},
+            {"$merge": {"into": self.collection, "on": ["precision", "cell"],
+                        "whenMatched": "replace", "whenNotMatched": "insert"}}
+        ]
+        await db["trips"].aggregate(pipeline).to_list(None)
+
+        # Cells the rebuild didn't touch have no trips behind them anymore
+        stale = await db[self.collection].delete_many({"updated_at": {"$lt": now}})
+        cells = await db[self.collection].count_documents({})
+        logger.info(f"Rebuilt {cells} map cells, removed {stale.deleted_count} stale")
+        return {"cells": cells, "removed": stale.deleted_count}
+
+
+geo_service = GeoService()
+
+
+if __name__ == "__main__":
+    from app.db import init_db
+
+    async def main():
+        await init_db()
+        print(await geo_service.backfill())
+
+    asyncio.run(main())
@@ -1,8 +1,15 @@
 import os
 import uuid
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, BinaryIO
 from fastapi import HTTPException
 from hdfs import InsecureClient, HdfsError
+import requests
+from requests.adapters import HTTPAdapter
+from app.utils.upload_utils import iter_upload_chunks
+from app.services.segment_store import SegmentStore
 import logging
 from datetime import datetime
 
@@ -16,13 +23,40 @@ class HDFSService:
         self.webui_url = os.getenv("HDFS_WEBUI", "http://namenode:9870")
         self.hdfs_user = os.getenv("HDFS_USER", "hadoop")
         self.client: Optional[InsecureClient] = None
+        self._session: Optional[requests.Session] = None
         self.base_path = "/travel_journal"
+        self.max_connections = int(os.getenv("HDFS_MAX_CONNECTIONS", "16"))
+        self.timeout = float(os.getenv("HDFS_TIMEOUT", "30"))
+        self.chunk_size = int(os.getenv("HDFS_CHUNK_SIZE", str(64 * 1024)))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_connections,
+            thread_name_prefix="hdfs"
+        )
+        self.segments = SegmentStore(self)
+        
+    def _create_session(self) -> requests.Session:
+        """Build a keep-alive HTTP session shared by all WebHDFS calls"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.max_connections,
+            pool_maxsize=self.max_connections
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
         
     def connect(self) -> bool:
         """Establish connection to HDFS"""
         try:
             logger.info(f"Connecting to HDFS at {self.webui_url} as {self.hdfs_user}")
-            self.client = InsecureClient(self.webui_url, user=self.hdfs_user)
+            if self._session is None:
+                self._session = self._create_session()
+            self.client = InsecureClient(
+                self.webui_url,
+                user=self.hdfs_user,
+                timeout=self.timeout,
+                session=self._session
+            )
             
             self.client.status("/")
             
@@ -42,6 +76,8 @@ class HDFSService:
             f"{self.base_path}/photos",
             f"{self.base_path}/photos/original",
             f"{self.base_path}/photos/thumbnails",
+            f"{self.base_path}/photos/renditions",
+            f"{self.base_path}/segments",
             f"{self.base_path}/backups",
             f"{self.base_path}/analytics",
             f"{self.base_path}/logs"
@@ -86,8 +122,6 @@ class HDFSService:
             with self.client.write(hdfs_path, overwrite=True) as writer:
                 writer.write(photo_data)
             
-            self._create_thumbnail(user_id, photo_data, unique_filename, file_ext)
-            
             logger.info(f"Photo uploaded successfully: {hdfs_path}")
             return hdfs_path
             
@@ -98,38 +132,62 @@ class HDFSService:
             logger.error(f"Unexpected error during upload: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
     
-    def _create_thumbnail(self, user_id: str, photo_data: bytes, filename: str, file_ext: str):
-        """Create thumbnail version of photo (optional)"""
-        try:
-            from PIL import Image
-            import io
+    def upload_photo_stream(self, user_id: str, source: BinaryIO, filename: str, max_size: int) -> dict:
+        """
+        Stream a photo to a fresh per-user HDFS path
         
-            thumb_dir = f"{self.base_path}/photos/thumbnails/{user_id}"
-            if not self.client.status(thumb_dir, strict=False):
-                self.client.makedirs(thumb_dir)
-            
+        Args:
+            user_id: User ID
+            source: Readable binary file (e.g. the UploadFile spool)
+            filename: Original filename
+            max_size: Maximum accepted size in bytes
         
-            image = Image.open(io.BytesIO(photo_data))
-            image.thumbnail((300, 300))
+        Returns:
+            Dict with hdfs_path, size, sha256 and content_type
+        """
+        return self.write_stream(self._user_photo_path(user_id, filename), source, max_size)
+    
+    def _user_photo_path(self, user_id: str, filename: str) -> str:
+        file_ext = os.path.splitext(filename)[1].lower() or '.jpg'
+        return f"{self.base_path}/photos/original/{user_id}/{uuid.uuid4()}{file_ext}"
+    
+    def write_stream(self, hdfs_path: str, source: BinaryIO, max_size: int, require_image: bool = True) -> dict:
+        """
+        Stream a file to HDFS in fixed-size chunks
         
-            thumb_io = io.BytesIO()
-            if file_ext in ['.jpg', '.jpeg']:
-                image.save(thumb_io, format='JPEG', quality=85)
-            elif file_ext == '.png':
-                image.save(thumb_io, format='PNG')
-            else:
-                image.save(thumb_io, format='JPEG', quality=85)
-            
-            thumb_data = thumb_io.getvalue()
+        The size limit, SHA-256 digest and sniffed MIME type are all computed
+        while the chunks are sent, so at most one chunk is held in memory and
+        an oversized or non-image upload is aborted as soon as it is detected.
+        
+        Returns:
+            Dict with hdfs_path, size, sha256 and content_type
+        """
+        if not self.client:
+            if not self.connect():
+                raise HTTPException(status_code=500, detail="HDFS not available")
+        
+        upload = {"hdfs_path": hdfs_path, "size": 0, "sha256": None, "content_type": None}
+        
+        try:
+            logger.info(f"Streaming photo to HDFS: {hdfs_path}")
             
-            thumb_path = f"{thumb_dir}/{filename}"
-            with self.client.write(thumb_path, overwrite=True) as writer:
-                writer.write(thumb_data)
-                
-        except ImportError:
-            logger.warning("PIL not installed, skipping thumbnail creation")
+            self.client.write(
+                hdfs_path,
+                data=iter_upload_chunks(source, max_size, upload, self.chunk_size, require_image),
+                overwrite=True
+            )
+        except HTTPException:
+            self.delete_file(hdfs_path)
+            raise
+        except HdfsError as e:
+            logger.error(f"HDFS upload error: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"HDFS upload failed: {str(e)}")
         except Exception as e:
-            logger.warning(f"Failed to create thumbnail: {str(e)}")
+            logger.error(f"Unexpected error during upload: {str(e)}")
+            raise HTTPException(status_code=500, detail=str(e))
+        
+        logger.info(f"Photo uploaded successfully: {hdfs_path} ({upload['size']} bytes)")
+        return upload
     
     def read_file(self, hdfs_path: str) -> bytes:
         """Read file from HDFS"""
@@ -147,6 +205,66 @@ class HDFSService:
             logger.error(f"Unexpected error reading from HDFS: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
     
+    def stat_file(self, hdfs_path: str) -> Optional[dict]:
+        """Get file status from HDFS, or None if the file does not exist"""
+        if not self.client:
+            if not self.connect():
+                raise HTTPException(status_code=500, detail="HDFS not available")
+        
+        return self.client.status(hdfs_path, strict=False)
+    
+    def _open_reader(self, hdfs_path: str, offset: int = 0, length: Optional[int] = None):
+        """Open a chunked HDFS reader, returning its context manager and chunk iterator"""
+        if not self.client:
+            if not self.connect():
+                raise HTTPException(status_code=500, detail="HDFS not available")
+        
+        try:
+            context = self.client.read(
+                hdfs_path, offset=offset, length=length, chunk_size=self.chunk_size
+            )
+            return context, context.__enter__()
+        except HdfsError as e:
+            logger.error(f"HDFS read error: {str(e)}")
+            raise HTTPException(status_code=404, detail="File not found in HDFS")
+    
+    def read_range(self, hdfs_path: str, offset: int, length: int) -> bytes:
+        """Positioned read of length bytes starting at offset"""
+        if not self.client:
+            if not self.connect():
+                raise HTTPException(status_code=500, detail="HDFS not available")
+        
+        try:
+            with self.client.read(hdfs_path, offset=offset, length=length) as reader:
+                return reader.read()
+        except HdfsError as e:
+            logger.error(f"HDFS read error: {str(e)}")
+            raise HTTPException(status_code=404, detail="File not found in HDFS")
+    
+    def create_empty_file(self, hdfs_path: str):
+        if not self.client:
+            if not self.connect():
+                raise HTTPException(status_code=500, detail="HDFS not available")
+        
+        self.client.write(hdfs_path, data=b"", overwrite=False)
+    
+    def append_file(self, hdfs_path: str, data):
+        """Append bytes (or an iterable of chunks) to an existing HDFS file"""
+        if not self.client:
+            if not self.connect():
+                raise HTTPException(status_code=500, detail="HDFS not available")
+        
+        self.client.write(hdfs_path, data=data, append=True)
+    
+    def write_file(self, hdfs_path: str, data: bytes):
+        """Write a small file to HDFS, replacing any existing one"""
+        if not self.client:
+            if not self.connect():
+                raise HTTPException(status_code=500, detail="HDFS not available")
+        
+        with self.client.write(hdfs_path, overwrite=True) as writer:
+            writer.write(data)
+    
     def delete_file(self, hdfs_path: str) -> bool:
         """Delete file from HDFS"""
         if not self.client:
@@ -176,38 +294,159 @@ class HDFSService:
             logger.error(f"Failed to list user photos: {str(e)}")
             return []
     
-    def get_hdfs_stats(self) -> dict:
-        """Get HDFS storage statistics"""
+    def content_summary(self, hdfs_path: str) -> dict:
+        """Get the HDFS content summary (length, file count, space consumed) of a directory"""
         if not self.client:
             if not self.connect():
-                return {"status": "disconnected"}
+                raise HTTPException(status_code=500, detail="HDFS not available")
         
-        try:
-            status = self.client.status("/")
-            
-            photos_count = 0
-            total_photo_size = 0
-            
-            try:
-                photos = self.client.list(f"{self.base_path}/photos/original", status=True)
-                for photo in photos:
-                    photos_count += 1
-                    total_photo_size += photo.get('length', 0)
-            except:
-                pass
-            
+        return self.client.content(hdfs_path, strict=False) or {}
+    
+    def fs_status(self) -> dict:
+        """
+        Filesystem capacity, used and remaining bytes
+
+        Uses WebHDFS GETSTATUS (Hadoop 3.3+) and falls back to the
+        NameNode's FSNamesystemState JMX bean on older clusters.
+        """
+        if not self.client:
+            if not self.connect():
+                raise HTTPException(status_code=500, detail="HDFS not available")
+
+        response = self._session.get(
+            f"{self.webui_url}/webhdfs/v1/",
+            params={"op": "GETSTATUS", "user.name": self.hdfs_user},
+            timeout=self.timeout
+        )
+        if response.ok:
+            status = response.json().get("FsStatus", {})
             return {
-                "status": "connected",
-                "hdfs_capacity": status.get('capacity', 0),
-                "hdfs_used": status.get('used', 0),
-                "hdfs_remaining": status.get('remaining', 0),
-                "photos_count": photos_count,
-                "total_photo_size": total_photo_size,
-                "base_path": self.base_path
+                "capacity": status.get("capacity", 0),
+                "used": status.get("used", 0),
+                "remaining": status.get("remaining", 0),
             }
-        except Exception as e:
-            logger.error(f"Failed to get HDFS stats: {str(e)}")
-            return {"status": "error", "message": str(e)}
+
+        response = self._session.get(
+            f"{self.webui_url}/jmx",
+            params={"qry": "Hadoop:service=NameNode,name=FSNamesystemState"},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        beans = response.json().get("beans") or [{}]
+        return {
+            "capacity": beans[0].get("CapacityTotal", 0),
+            "used": beans[0].get("CapacityUsed", 0),
+            "remaining": beans[0].get("CapacityRemaining", 0),
+        }
+    
+    async def _run(self, func, *args, **kwargs):
+        """
+        Run a blocking WebHDFS call on the HDFS thread pool
+        
+        The pool size caps how many HDFS round trips a worker has in flight;
+        extra calls queue up without blocking the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+    
+    async def connect_async(self) -> bool:
+        return await self._run(self.connect)
+    
+    async def upload_photo_async(self, user_id: str, photo_data: bytes, filename: str) -> str:
+        hdfs_path = self._user_photo_path(user_id, filename)
+        if self.segments.handles(hdfs_path):
+            await self.segments.put_bytes(hdfs_path, photo_data)
+            return hdfs_path
+        return await self._run(self.upload_photo, user_id, photo_data, filename)
+    
+    async def upload_photo_stream_async(self, user_id: str, source: BinaryIO, filename: str, max_size: int) -> dict:
+        hdfs_path = self._user_photo_path(user_id, filename)
+        return await self.write_stream_async(hdfs_path, source, max_size)
+    
+    async def write_stream_async(
+        self, hdfs_path: str, source: BinaryIO, max_size: int, require_image: bool = True
+    ) -> dict:
+        if self.segments.handles(hdfs_path):
+            return await self.segments.put_stream(hdfs_path, source, max_size, require_image)
+        return await self._run(self.write_stream, hdfs_path, source, max_size, require_image)
+    
+    async def read_file_async(self, hdfs_path: str) -> bytes:
+        if self.segments.handles(hdfs_path):
+            location = await self.segments.lookup(hdfs_path)
+            if location:
+                return await self.segments.read(location)
+        return await self._run(self.read_file, hdfs_path)
+    
+    async def stat_file_async(self, hdfs_path: str) -> Optional[dict]:
+        if self.segments.handles(hdfs_path):
+            location = await self.segments.lookup(hdfs_path)
+            if location:
+                return {"length": location["length"], "type": "FILE", "packed": True}
+        return await self._run(self.stat_file, hdfs_path)
+    
+    async def open_stream_async(self, hdfs_path: str, offset: int = 0, length: Optional[int] = None):
+        """
+        Open an HDFS file (or a byte range of it) for streaming
+        
+        The file is opened before this returns, so a missing path raises
+        here rather than after response headers have been sent.
+        
+        Returns:
+            Async iterator yielding chunks of at most chunk_size bytes
+        """
+        if self.segments.handles(hdfs_path):
+            location = await self.segments.lookup(hdfs_path)
+            if location:
+                hdfs_path = location["segment"]
+                if length is None:
+                    length = location["length"] - offset
+                offset += location["offset"]
+        
+        context, reader = await self._run(self._open_reader, hdfs_path, offset, length)
+        return self._iter_reader(context, reader)
+    
+    async def _iter_reader(self, context, reader):
+        done = object()
+        try:
+            while True:
+                chunk = await self._run(next, reader, done)
+                if chunk is done:
+                    break
+                if chunk:
+                    yield chunk
+        finally:
+            await self._run(context.__exit__, None, None, None)
+    
+    async def write_file_async(self, hdfs_path: str, data: bytes):
+        if self.segments.handles(hdfs_path):
+            await self.segments.put_bytes(hdfs_path, data)
+            return
+        return await self._run(self.write_file, hdfs_path, data)
+    
+    async def append_file_async(self, hdfs_path: str, data: bytes):
+        return await self._run(self.append_file, hdfs_path, data)
+    
+    async def delete_file_async(self, hdfs_path: str) -> bool:
+        if self.segments.handles(hdfs_path) and await self.segments.delete(hdfs_path):
+            return True
+        return await self._run(self.delete_file, hdfs_path)
+    
+    async def list_user_photos_async(self, user_id: str) -> list:
+        return await self._run(self.list_user_photos, user_id)
+    
+    async def content_summary_async(self, hdfs_path: str) -> dict:
+        return await self._run(self.content_summary, hdfs_path)
+    
+    async def fs_status_async(self) -> dict:
+        return await self._run(self.fs_status)
+    
+    def shutdown(self):
+        """Release pooled connections and worker threads"""
+        self._executor.shutdown(wait=False)
+        if self._session:
+            self._session.close()
 
 
 hdfs_service = HDFSService()
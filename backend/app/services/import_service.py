@@ -0,0 +1,277 @@
+# backend/app/services/import_service.py
+import os
+import json
+import asyncio
+import logging
+import zipfile
+import tempfile
+from datetime import datetime
+from typing import BinaryIO, List, Optional
+from fastapi import HTTPException
+from app.db import get_database
+from app.services.storage_backend import storage
+from app.services.blob_service import blob_service
+from app.services.thumbnail_service import thumbnail_service
+from app.services.leaderboard_service import leaderboard_service
+from app.services.storage_stats import storage_stats
+from app.services.rollup_service import rollup_service
+from app.services.geo_service import geo_service
+from app.utils.geo import exif_gps
+from app.services.analytics_service import analytics_sink
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+TRIP_FIELDS = ("country", "place_name", "description")
+# Spool extracted archive members to disk past this size
+SPOOL_MAX_MEMORY = 1024 * 1024
+MAX_MANIFEST_SIZE = 1024 * 1024
+
+
+def parse_manifest(raw: Optional[str]) -> list:
+    """Parse per-photo metadata: a JSON list of objects, optionally keyed by filename"""
+    if not raw:
+        return []
+    try:
+        entries = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Import metadata must be valid JSON")
+    if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+        raise HTTPException(status_code=400, detail="Import metadata must be a list of objects")
+    return entries
+
+
+def match_metadata(filenames: List[str], entries: list, defaults: dict) -> list:
+    """
+    Pair each photo with its metadata
+
+    Entries naming a `filename` are matched by name, the rest by position.
+    Fields missing from an entry fall back to the request-wide defaults.
+    """
+    by_name = {entry["filename"]: entry for entry in entries if entry.get("filename")}
+    positional = [entry for entry in entries if not entry.get("filename")]
+    matched = []
+    for index, filename in enumerate(filenames):
+        entry = by_name.get(filename)
+        if entry is None and index < len(positional):
+            entry = positional[index]
+        merged = {field: (entry or {}).get(field) or defaults.get(field) for field in TRIP_FIELDS}
+        matched.append(merged)
+    return matched
+
+
+def extract_archive(archive: BinaryIO, max_items: int, max_size: int) -> tuple:
+    """
+    Unpack a zip of photos into temporary spools
+
+    Returns:
+        (members, manifest) where members is a list of (filename, spool)
+        and manifest the raw text of an optional manifest.json
+    """
+    try:
+        bundle = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Archive must be a zip file")
+
+    members, manifest = [], None
+    with bundle:
+        for info in bundle.infolist():
+            name = os.path.basename(info.filename)
+            if info.is_dir() or not name or name.startswith("."):
+                continue
+            if name == MANIFEST_NAME:
+                if info.file_size > MAX_MANIFEST_SIZE:
+                    raise HTTPException(status_code=400, detail="Import manifest is too large")
+                with bundle.open(info) as member:
+                    raw = member.read(MAX_MANIFEST_SIZE + 1)
+                if len(raw) > MAX_MANIFEST_SIZE:
+                    raise HTTPException(status_code=400, detail="Import manifest is too large")
+                try:
+                    manifest = raw.decode("utf-8")
+                except UnicodeDecodeError:
+                    raise HTTPException(status_code=400, detail="Import manifest must be UTF-8 JSON")
+                continue
+            if len(members) >= max_items:
+                raise HTTPException(status_code=400, detail=f"At most {max_items} photos per import")
+            # Declared sizes can lie; iter_upload_chunks enforces the real one
+            if info.file_size > max_size:
+                members.append((name, None))
+                continue
+            spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+            with bundle.open(info) as member:
+                copied = 0
+                while copied <= max_size:
+                    chunk = member.read(64 * 1024)
+                    if not chunk:
+                        break
+                    spool.write(chunk)
+                    copied += len(chunk)
+            members.append((name, spool))
+    return members, manifest
+
+
+class TripImportService:
+    """
+    Bulk trip creation from many photos in one request
+
+    Photos are stored concurrently, at most TRIP_IMPORT_CONCURRENCY at a
+    time, through the same deduplicating blob store as single uploads.
+    The trips that stored successfully are then written with one
+    insert_many and one leaderboard / storage counter update per import,
+    and each item gets its own result.
+    """
+
+    def __init__(self):
+        self.concurrency = int(os.getenv("TRIP_IMPORT_CONCURRENCY", "4"))
+        self.max_items = int(os.getenv("TRIP_IMPORT_MAX_ITEMS", "100"))
+
+    async def _store(self, semaphore: asyncio.Semaphore, source: Optional[BinaryIO], max_size: int) -> dict:
+        if source is None:
+            return {"error": f"Image size must be less than {max_size // (1024 * 1024)}MB"}
+        async with semaphore:
+            try:
+                upload = await blob_service.store(source, max_size)
+            except HTTPException as e:
+                return {"error": e.detail}
+            except Exception as e:
+                logger.error(f"Import failed to store photo: {str(e)}")
+                return {"error": "Failed to store photo"}
+            renditions = None
+            if upload["deduplicated"]:
+                renditions = await thumbnail_service.shared_renditions(upload["hdfs_path"])
+            gps = await asyncio.to_thread(exif_gps, source)
+            return {"upload": upload, "renditions": renditions, "gps": gps}
+
+    async def _release(self, upload: dict):
+        try:
+            if await blob_service.release(upload["sha256"], upload["hdfs_path"]):
+                await storage.delete(upload["hdfs_path"])
+        except Exception as e:
+            logger.warning(f"Failed to release imported photo {upload['hdfs_path']}: {str(e)}")
+
+    async def _insert(self, user_id: str, trips: list, created: list) -> tuple:
+        """
+        Write the trips with one insert_many, settling partial failures
+
+        Returns:
+            (trips, created) narrowed to the trips that were actually saved
+        """
+        db = get_database()
+        # insert_many assigns every _id up front, so survivors can be looked up
+        try:
+            await db["trips"].insert_many(trips, ordered=False)
+            saved = {trip["_id"] for trip in trips}
+        except Exception as e:
+            logger.error(f"Import insert failed for user {user_id}: {str(e)}", exc_info=True)
+            try:
+                ids = [trip["_id"] for trip in trips]
+                saved = {trip["_id"] async for trip in db["trips"].find({"_id": {"$in": ids}}, {"_id": 1})}
+            except Exception as e:
+                # Unknown outcome: keep every blob rather than risk one a saved trip uses
+                logger.error(f"Could not verify imported trips for user {user_id}: {str(e)}")
+                for result, _, _ in created:
+                    result.update(status="failed", error="Failed to save trip")
+                return [], []
+
+        kept_trips, kept = [], []
+        for trip, (result, upload, rendered) in zip(trips, created):
+            if trip["_id"] not in saved:
+                await self._release(upload)
+                result.update(status="failed", error="Failed to save trip")
+                continue
+            result.update(
+                status="created",
+                trip_id=str(trip["_id"]),
+                deduplicated=upload["deduplicated"],
+                photo_url=f"/api/trips/photo/{trip['_id']}"
+            )
+            kept_trips.append(trip)
+            kept.append((result, upload, rendered))
+        return kept_trips, kept
+
+    async def import_trips(self, current_user: dict, photos: list, max_size: int) -> dict:
+        """
+        Create one trip per photo
+
+        Args:
+            current_user: Authenticated user document
+            photos: Dicts with filename, source (a seekable file or None when
+                already known to be too large) and the TRIP_FIELDS
+            max_size: Per-photo size limit in bytes
+
+        Returns:
+            Dict with per-item results (in input order), the created trip
+            documents under "trips" and counts
+        """
+        if not photos:
+            raise HTTPException(status_code=400, detail="No photos to import")
+        if len(photos) > self.max_items:
+            raise HTTPException(status_code=400, detail=f"At most {self.max_items} photos per import")
+
+        user_id = str(current_user.get("_id"))
+        results = [{"index": index, "filename": photo["filename"]} for index, photo in enumerate(photos)]
+
+        pending = []
+        for result, photo in zip(results, photos):
+            missing = [field for field in ("country", "place_name") if not photo.get(field)]
+            if missing:
+                result.update(status="failed", error=f"Missing {', '.join(missing)}")
+            else:
+                pending.append((result, photo))
+
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+        stored = await asyncio.gather(
+            *(self._store(semaphore, photo["source"], max_size) for _, photo in pending)
+        )
+
+        now = datetime.utcnow()
+        trips, created = [], []
+        for (result, photo), outcome in zip(pending, stored):
+            if "error" in outcome:
+                result.update(status="failed", error=outcome["error"])
+                continue
+            upload = outcome["upload"]
+            trips.append({
+                "user_id": user_id,
+                "user_email": current_user.get("email"),
+                "username": current_user.get("username"),
+                "country": photo["country"],
+                "place_name": photo["place_name"],
+                "description": photo.get("description") or "",
+                "photo_hdfs_path": upload["hdfs_path"],
+                "photo_filename": photo["filename"],
+                "photo_size": upload["size"],
+                "photo_content_type": upload["content_type"],
+                "photo_sha256": upload["sha256"],
+                "renditions": outcome["renditions"] or thumbnail_service.pending_renditions(),
+                **geo_service.locate(photo["country"], photo["place_name"], outcome["gps"]),
+                "created_at": now,
+                "updated_at": now
+            })
+            created.append((result, upload, outcome["renditions"] is not None))
+
+        if trips:
+            trips, created = await self._insert(user_id, trips, created)
+
+        if trips:
+            await leaderboard_service.record_trips(user_id, [trip["country"] for trip in trips])
+            await rollup_service.record_trips(trips)
+            await geo_service.record_trips(trips)
+            await storage_stats.record_upload(
+                user_id,
+                sum(upload["size"] for _, upload, _ in created),
+                sum(0 if upload["deduplicated"] else upload["size"] for _, upload, _ in created),
+                count=len(trips)
+            )
+            analytics_sink.emit("trip_import", user_id=user_id, count=len(trips))
+
+        return {
+            "results": results,
+            "trips": trips,
+            "rendered": [ready for _, _, ready in created],
+            "created": len(trips),
+            "failed": len(results) - len(trips),
+        }
+
+
+trip_import_service = TripImportService()
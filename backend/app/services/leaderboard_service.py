@@ -0,0 +1,154 @@
+# backend/app/services/leaderboard_service.py
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from app.db import get_database
+from app.utils.user_views import USER_CARD_PROJECTION
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 100
+
+
+def country_key(country: str) -> str:
+    return (country or "").strip().lower()
+
+
+class LeaderboardService:
+    """
+    Distinct-countries leaderboard maintained on trip upload and delete
+
+    `user_countries` keeps one document per (user, country) with the number
+    of trips behind it. Only a 0 -> 1 or 1 -> 0 transition touches the
+    user's countriesVisited, which is indexed so top-K pages and rank
+    lookups are index scans instead of loading every user and trip.
+    """
+
+    collection = "user_countries"
+
+    async def _adjust_user(self, user_id: str, delta: int):
+        db = get_database()
+        await db["users"].update_one({"_id": ObjectId(user_id)}, {"$inc": {"countriesVisited": delta}})
+
+    async def _add_trips(self, user_id: str, country: str, count: int) -> bool:
+        """Add trips to an entry; True when it went from 0 to `count` (a new country)"""
+        db = get_database()
+        key = {"user_id": user_id, "country": country_key(country)}
+        update = {"$inc": {"trips": count}, "$set": {"updated_at": datetime.utcnow()}}
+        try:
+            entry = await db[self.collection].find_one_and_update(
+                key, update, upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Lost a concurrent upsert race; the document exists now
+            entry = await db[self.collection].find_one_and_update(
+                key, update, return_document=ReturnDocument.AFTER
+            )
+        return bool(entry) and entry["trips"] == count
+
+    async def record_trip(self, user_id: str, country: str):
+        if await self._add_trips(user_id, country, 1):
+            await self._adjust_user(user_id, 1)
+
+    async def record_trips(self, user_id: str, countries: list):
+        """Record a batch of a user's trips with a single countriesVisited update"""
+        counts = Counter(country_key(country) for country in countries)
+        new_countries = 0
+        for country, count in counts.items():
+            if await self._add_trips(user_id, country, count):
+                new_countries += 1
+        if new_countries:
+            await self._adjust_user(user_id, new_countries)
+
+    async def remove_trip(self, user_id: str, country: str):
+        db = get_database()
+        key = {"user_id": user_id, "country": country_key(country)}
+        entry = await db[self.collection].find_one_and_update(
+            {**key, "trips": {"$gt": 0}},
+            {"$inc": {"trips": -1}, "$set": {"updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not entry or entry["trips"] > 0:
+            return
+        # Whoever sees the count reach zero owns the decrement, even if a
+        # concurrent upload revives the entry before it is cleaned up
+        await self._adjust_user(user_id, -1)
+        await db[self.collection].delete_one({**key, "trips": {"$lte": 0}})
+
+    async def top(self, limit: int = 50, offset: int = 0) -> list:
+        db = get_database()
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        cursor = (
+            db["users"]
+            .find({}, USER_CARD_PROJECTION)
+            .sort([("countriesVisited", -1), ("_id", 1)])
+            .skip(max(offset, 0))
+            .limit(limit)
+        )
+        return await cursor.to_list(limit)
+
+    async def rank(self, user_id: str) -> Optional[dict]:
+        """Competition rank of a user: one more than the number of users with more countries"""
+        db = get_database()
+        user = await db["users"].find_one({"_id": ObjectId(user_id)}, {"countriesVisited": 1})
+        if not user:
+            return None
+        score = user.get("countriesVisited", 0)
+        ahead = await db["users"].count_documents({"countriesVisited": {"$gt": score}})
+        return {
+            "user_id": user_id,
+            "countriesVisited": score,
+            "rank": ahead + 1,
+            "total_users": await db["users"].estimated_document_count()
+        }
+
+    async def rebuild(self) -> dict:
+        """Recompute every entry and countriesVisited from the trips collection"""
+        db = get_database()
+        now = datetime.utcnow()
+
+        pipeline = [
+            {"$group": {
+                "_id": {"user_id": "$user_id", "country": {"$toLower": {"$trim": {"input": "$country"}}}},
+                "trips": {"$sum": 1}
+            }},
+            {"$project": {"_id": 0, "user_id": "$_id.user_id", "country": "$_id.country",
+                          "trips": 1, "updated_at": {"$literal": now}}},
+            {"$merge": {"into": self.collection, "on": ["user_id", "country"],
+                        "whenMatched": "replace", "whenNotMatched": "insert"}}
+        ]
+        await db["trips"].aggregate(pipeline).to_list(None)
+        await db[self.collection].delete_many({"updated_at": {"$lt": now}})
+
+        counts = {}
+        async for row in db[self.collection].aggregate([{"$group": {"_id": "$user_id", "countries": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["countries"]
+
+        ops = []
+        async for user in db["users"].find({}, {"countriesVisited": 1}):
+            countries = counts.get(str(user["_id"]), 0)
+            if user.get("countriesVisited") != countries:
+                ops.append(UpdateOne({"_id": user["_id"]}, {"$set": {"countriesVisited": countries}}))
+        if ops:
+            await db["users"].bulk_write(ops, ordered=False)
+
+        logger.info(f"Leaderboard rebuilt: {len(counts)} users with trips, {len(ops)} corrected")
+        return {"users_with_trips": len(counts), "users_corrected": len(ops)}
+
+
+leaderboard_service = LeaderboardService()
+
+
+if __name__ == "__main__":
+    from app.db import init_db
+
+    async def main():
+        await init_db()
+        print(await leaderboard_service.rebuild())
+
+    asyncio.run(main())
@@ -5,15 +5,15 @@ from app.models.trip_model import Trip
 from beanie import PydanticObjectId
 from fastapi import HTTPException, UploadFile
 from datetime import datetime
+from app.services.storage_backend import storage
 
-UPLOAD_DIR = "static/uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+UPLOAD_DIR = f"{storage.base_path}/uploads/media"
+MAX_MEDIA_SIZE = 10 * 1024 * 1024
 
 # Save media
 async def save_media(file: UploadFile, user_id: str = None, trip_id: str = None) -> Media:
-    file_path = os.path.join(UPLOAD_DIR, f"{datetime.utcnow().timestamp()}_{file.filename}")
-    with open(file_path, "wb") as f:
-        f.write(await file.read())
+    file_path = f"{UPLOAD_DIR}/{datetime.utcnow().timestamp()}_{os.path.basename(file.filename)}"
+    await storage.write_stream(file_path, file.file, MAX_MEDIA_SIZE, require_image=False)
 
     user = await User.get(PydanticObjectId(user_id)) if user_id else None
     trip = await Trip.get(PydanticObjectId(trip_id)) if trip_id else None
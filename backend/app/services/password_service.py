@@ -0,0 +1,95 @@
+# backend/app/services/password_service.py
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordService:
+    """
+    bcrypt hashing and verification on a dedicated, bounded thread pool
+
+    bcrypt releases the GIL while it works, so a few threads hash in
+    parallel while the event loop keeps serving other requests. At most
+    PASSWORD_MAX_PENDING operations may be queued or running; beyond that
+    callers get a 503 with Retry-After instead of queueing without bound.
+    """
+
+    def __init__(self):
+        self.rounds = int(os.getenv("BCRYPT_ROUNDS", "12"))
+        self.workers = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self.max_pending = int(os.getenv("PASSWORD_MAX_PENDING", str(self.workers * 8)))
+        self.retry_after = int(os.getenv("PASSWORD_RETRY_AFTER_SECONDS", "1"))
+        # min == max == default makes verify_and_update flag any other cost
+        self.context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=self.rounds,
+            bcrypt__min_rounds=self.rounds,
+            bcrypt__max_rounds=self.rounds
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self.metrics = {"hashed": 0, "verified": 0, "rehashed": 0, "rejected": 0, "peak_pending": 0}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self._pending >= self.max_pending:
+            self.metrics["rejected"] += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Authentication service busy, please retry",
+                headers={"Retry-After": str(self.retry_after)}
+            )
+        self._pending += 1
+        self.metrics["peak_pending"] = max(self.metrics["peak_pending"], self._pending)
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        hashed = await self._run(self.context.hash, password)
+        self.metrics["hashed"] += 1
+        return hashed
+
+    async def verify(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """
+        Check a password against its stored hash
+
+        Returns:
+            (valid, new_hash); new_hash is set when the stored hash used a
+            different cost factor and should be replaced
+        """
+        valid, new_hash = await self._run(self.context.verify_and_update, password, hashed)
+        self.metrics["verified"] += 1
+        if new_hash:
+            self.metrics["rehashed"] += 1
+        return valid, new_hash
+
+    def stats(self) -> dict:
+        return {
+            **self.metrics,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "workers": self.workers,
+            "rounds": self.rounds,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_service = PasswordService()
@@ -0,0 +1,219 @@
+# backend/app/services/photo_cache.py
+import os
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+class PhotoCache:
+    """
+    Read-through cache for photo bytes keyed by storage path
+
+    Small entries live in an in-memory LRU tier; everything cacheable is
+    also kept in a larger local-disk tier. Both tiers are bounded by bytes
+    and evict least recently used entries first.
+    """
+
+    def __init__(self):
+        self.memory_budget = int(os.getenv("PHOTO_CACHE_MEMORY_MB", "64")) * MB
+        self.disk_budget = int(os.getenv("PHOTO_CACHE_DISK_MB", "1024")) * MB
+        self.max_memory_entry = int(os.getenv("PHOTO_CACHE_MAX_MEMORY_ENTRY_KB", "512")) * 1024
+        self.max_entry = int(os.getenv("PHOTO_CACHE_MAX_ENTRY_MB", "4")) * MB
+        self.disk_dir = os.getenv("PHOTO_CACHE_DIR", "/tmp/travel_journal_photo_cache")
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_loaded = False
+        self._disk_load_lock: Optional[asyncio.Lock] = None
+        self._loading: dict = {}
+
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+            "invalidations": 0,
+        }
+
+    def accepts(self, size: int) -> bool:
+        """Whether an object of this size is worth caching"""
+        return 0 < size <= self.max_entry
+
+    @staticmethod
+    def _disk_key(path: str) -> str:
+        return hashlib.sha1(path.encode("utf-8")).hexdigest()
+
+    def _disk_file(self, disk_key: str) -> str:
+        return os.path.join(self.disk_dir, disk_key)
+
+    def _load_disk_index(self):
+        """Rebuild the disk tier index from files left by a previous run"""
+        os.makedirs(self.disk_dir, exist_ok=True)
+        entries = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._disk[name] = size
+            self._disk_bytes += size
+        self._disk_loaded = True
+
+    async def _ensure_disk_index(self):
+        if self._disk_loaded:
+            return
+        if self._disk_load_lock is None:
+            self._disk_load_lock = asyncio.Lock()
+        # Concurrent first requests must not each count the files again
+        async with self._disk_load_lock:
+            if not self._disk_loaded:
+                await asyncio.to_thread(self._load_disk_index)
+                self._evict_disk()
+
+    def _remember(self, path: str, data: bytes):
+        if len(data) > self.max_memory_entry or len(data) > self.memory_budget:
+            return
+        old = self._memory.pop(path, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[path] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_budget:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.counters["memory_evictions"] += 1
+
+    def _evict_disk(self):
+        while self._disk_bytes > self.disk_budget and self._disk:
+            disk_key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.counters["disk_evictions"] += 1
+            try:
+                os.remove(self._disk_file(disk_key))
+            except OSError:
+                pass
+
+    def _write_disk_file(self, disk_key: str, data: bytes):
+        tmp_path = f"{self._disk_file(disk_key)}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._disk_file(disk_key))
+
+    def _read_disk_file(self, disk_key: str) -> Optional[bytes]:
+        try:
+            with open(self._disk_file(disk_key), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    async def get(self, path: str) -> Optional[bytes]:
+        data = self._memory.get(path)
+        if data is not None:
+            self._memory.move_to_end(path)
+            self.counters["memory_hits"] += 1
+            return data
+
+        await self._ensure_disk_index()
+        disk_key = self._disk_key(path)
+        if disk_key in self._disk:
+            data = await asyncio.to_thread(self._read_disk_file, disk_key)
+            if data is not None:
+                self._disk.move_to_end(disk_key)
+                self.counters["disk_hits"] += 1
+                self._remember(path, data)
+                return data
+            self._disk_bytes -= self._disk.pop(disk_key, 0)
+
+        self.counters["misses"] += 1
+        return None
+
+    async def put(self, path: str, data: bytes):
+        if not self.accepts(len(data)):
+            return
+        self._remember(path, data)
+
+        await self._ensure_disk_index()
+        disk_key = self._disk_key(path)
+        try:
+            await asyncio.to_thread(self._write_disk_file, disk_key, data)
+        except OSError as e:
+            logger.warning(f"Photo cache disk write failed: {str(e)}")
+            return
+        self._disk_bytes -= self._disk.pop(disk_key, 0)
+        self._disk[disk_key] = len(data)
+        self._disk_bytes += len(data)
+        self._evict_disk()
+
+    async def get_or_load(self, path: str, loader: Callable[[str], Awaitable[bytes]]) -> bytes:
+        """
+        Return cached bytes for path, loading and caching them on a miss
+
+        Concurrent misses for the same path share a single load.
+        """
+        data = await self.get(path)
+        if data is not None:
+            return data
+
+        pending = self._loading.get(path)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[path] = future
+        try:
+            data = await loader(path)
+            await self.put(path, data)
+            future.set_result(data)
+            return data
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            self._loading.pop(path, None)
+
+    async def invalidate(self, path: str):
+        data = self._memory.pop(path, None)
+        if data is not None:
+            self._memory_bytes -= len(data)
+
+        await self._ensure_disk_index()
+        disk_key = self._disk_key(path)
+        on_disk = disk_key in self._disk
+        if data is not None or on_disk:
+            self.counters["invalidations"] += 1
+        if on_disk:
+            self._disk_bytes -= self._disk.pop(disk_key)
+            try:
+                await asyncio.to_thread(os.remove, self._disk_file(disk_key))
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            **self.counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "memory_budget": self.memory_budget,
+            "disk_entries": len(self._disk),
+            "disk_bytes": self._disk_bytes,
+            "disk_budget": self.disk_budget,
+        }
+
+
+photo_cache = PhotoCache()
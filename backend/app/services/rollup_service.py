@@ -0,0 +1,180 @@
+# backend/app/services/rollup_service.py
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from app.db import get_database
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 100
+MAX_DAYS = 366
+DAY_FORMAT = "%Y-%m-%d"
+
+
+def normalize(value: str) -> str:
+    return (value or "").strip().lower()
+
+
+def rollup_keys(trip: dict) -> list:
+    """(kind, key, labels) of every counter a trip contributes to"""
+    country = normalize(trip.get("country"))
+    place = normalize(trip.get("place_name"))
+    created_at = trip.get("created_at") or datetime.utcnow()
+    return [
+        ("country", country, {"country": trip.get("country")}),
+        ("place", f"{country}|{place}", {"country": trip.get("country"), "place_name": trip.get("place_name")}),
+        ("day", created_at.strftime(DAY_FORMAT), {}),
+    ]
+
+
+class RollupService:
+    """
+    Trip counters per country, per place and per day
+
+    `trip_rollups` holds one small document per (kind, key), updated as
+    trips are created and deleted, so "top countries", "most visited
+    places" and "trips per day/month" read a handful of indexed documents
+    no matter how many trips exist. rebuild() recomputes everything from
+    `trips` with a single aggregation.
+    """
+
+    collection = "trip_rollups"
+
+    async def _apply(self, counts: Counter, labels: dict):
+        if not counts:
+            return
+        db = get_database()
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"kind": kind, "key": key},
+                {"$inc": {"trips": delta}, "$set": {**labels[(kind, key)], "updated_at": now}},
+                upsert=delta > 0
+            )
+            for (kind, key), delta in counts.items() if delta
+        ]
+        if operations:
+            await db[self.collection].bulk_write(operations, ordered=False)
+
+    async def record_trips(self, trips: list):
+        """Count newly created trips; one bulk write however many there are"""
+        counts, labels = Counter(), {}
+        for trip in trips:
+            for kind, key, label in rollup_keys(trip):
+                counts[(kind, key)] += 1
+                labels[(kind, key)] = label
+        try:
+            await self._apply(counts, labels)
+        except Exception as e:
+            # Counters are repaired by the next rebuild
+            logger.error(f"Failed to record trip rollups: {str(e)}")
+
+    async def record_trip(self, trip: dict):
+        await self.record_trips([trip])
+
+    async def remove_trip(self, trip: dict):
+        counts, labels = Counter(), {}
+        for kind, key, label in rollup_keys(trip):
+            counts[(kind, key)] -= 1
+            labels[(kind, key)] = label
+        try:
+            await self._apply(counts, labels)
+            db = get_database()
+            await db[self.collection].delete_many({
+                "$or": [{"kind": kind, "key": key} for kind, key in counts],
+                "trips": {"$lte": 0}
+            })
+        except Exception as e:
+            logger.error(f"Failed to remove trip rollups: {str(e)}")
+
+    async def _top(self, kind: str, limit: int, fields: dict) -> list:
+        db = get_database()
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        cursor = (
+            db[self.collection]
+            .find({"kind": kind}, {"_id": 0, "trips": 1, **fields})
+            .sort([("trips", -1), ("key", 1)])
+            .limit(limit)
+        )
+        return await cursor.to_list(limit)
+
+    async def top_countries(self, limit: int = 20) -> list:
+        return await self._top("country", limit, {"country": 1})
+
+    async def top_places(self, limit: int = 20) -> list:
+        return await self._top("place", limit, {"country": 1, "place_name": 1})
+
+    async def country_total(self, country: str) -> int:
+        db = get_database()
+        entry = await db[self.collection].find_one({"kind": "country", "key": normalize(country)}, {"trips": 1})
+        return entry.get("trips", 0) if entry else 0
+
+    async def daily(self, days: int = 30) -> list:
+        """Trips per day for the last `days` days, oldest first, zero-filled"""
+        days = max(1, min(days, MAX_DAYS))
+        today = datetime.utcnow().date()
+        keys = [(today - timedelta(days=offset)).strftime(DAY_FORMAT) for offset in range(days - 1, -1, -1)]
+        db = get_database()
+        cursor = db[self.collection].find(
+            {"kind": "day", "key": {"$gte": keys[0], "$lte": keys[-1]}}, {"_id": 0, "key": 1, "trips": 1}
+        )
+        counts = {entry["key"]: entry["trips"] async for entry in cursor}
+        return [{"day": key, "trips": counts.get(key, 0)} for key in keys]
+
+    async def monthly(self, months: int = 12) -> list:
+        """Trips per month, summed from at most a year of day counters"""
+        months = max(1, min(months, 12))
+        totals = Counter()
+        for entry in await self.daily(MAX_DAYS):
+            totals[entry["day"][:7]] += entry["trips"]
+        ordered = sorted(totals.items())[-months:]
+        return [{"month": month, "trips": trips} for month, trips in ordered]
+
+    async def rebuild(self) -> dict:
+        """Recompute every rollup from the trips collection in one pipeline"""
+        db = get_database()
+        now = datetime.utcnow()
+        country = {"$toLower": {"$trim": {"input": {"$ifNull": ["$country", ""]}}}}
+        place = {"$toLower": {"$trim": {"input": {"$ifNull": ["$place_name", ""]}}}}
+
+        pipeline = [
+            {"$project": {"entries": [
+                {"kind": "country", "key": country, "country": "$country"},
+                {"kind": "place", "key": {"$concat": [country, "|", place]},
+                 "country": "$country", "place_name": "$place_name"},
+                {"kind": "day", "key": {"$dateToString": {"format": DAY_FORMAT, "date": "$created_at"}}},
+            ]}},
+            {"$unwind": "$entries"},
+            {"$group": {
+                "_id": {"kind": "$entries.kind", "key": "$entries.key"},
+                "trips": {"$sum": 1},
+                "country": {"$first": "$entries.country"},
+                "place_name": {"$first": "$entries.place_name"}
+            }},
+            {"$project": {"_id": 0, "kind": "$_id.kind", "key": "$_id.key", "trips": 1,
+                          "country": 1, "place_name": 1, "updated_at": {"$literal": now}}},
+            {"$merge": {"into": self.collection, "on": ["kind", "key"],
+                        "whenMatched": "replace", "whenNotMatched": "insert"}}
+        ]
+        await db["trips"].aggregate(pipeline).to_list(None)
+
+        # Anything the rebuild didn't touch has no trips behind it anymore
+        stale = await db[self.collection].delete_many({"updated_at": {"$lt": now}})
+        total = await db[self.collection].count_documents({})
+        logger.info(f"Rebuilt {total} trip rollups, removed {stale.deleted_count} stale")
+        return {"rollups": total, "removed": stale.deleted_count}
+
+
+rollup_service = RollupService()
+
+
+if __name__ == "__main__":
+    from app.db import init_db
+
+    async def main():
+        await init_db()
+        print(await rollup_service.rebuild())
+
+    asyncio.run(main())
@@ -0,0 +1,304 @@
+# backend/app/services/segment_store.py
+import os
+import uuid
+import socket
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import BinaryIO, Optional
+from pymongo import ReturnDocument
+from app.db import get_database
+from app.utils.upload_utils import iter_upload_chunks
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+class SegmentWriter:
+    """One append slot; each slot owns its own open segment file"""
+
+    def __init__(self):
+        self.path: Optional[str] = None
+        self.size = 0
+
+
+class SegmentStore:
+    """
+    Packs small photo objects into large append-only HDFS segment files
+
+    Each object keeps its logical HDFS path; the packed_objects collection
+    maps that path to (segment, offset, length), so a read is a single
+    positioned read. Deletes only mark bytes dead; compact() rewrites
+    segments whose dead ratio is high and retires the old files.
+
+    HDFS allows one writer per file, so every writer slot in every process
+    appends to a segment of its own. Open segments record their owning
+    process and a heartbeat refreshed every HDFS_SEGMENT_HEARTBEAT_SECONDS;
+    close() seals them on shutdown, and a segment whose heartbeat is older
+    than HDFS_SEGMENT_OWNER_TIMEOUT_MINUTES belonged to a process that
+    died without sealing it, so compact() treats it as sealed.
+    """
+
+    objects = "packed_objects"
+    segments = "packed_segments"
+
+    def __init__(self, hdfs):
+        self.hdfs = hdfs
+        self.enabled = os.getenv("HDFS_PACK_PHOTOS", "true").lower() == "true"
+        self.segment_max = int(os.getenv("HDFS_SEGMENT_MAX_MB", "256")) * MB
+        self.writer_count = int(os.getenv("HDFS_SEGMENT_WRITERS", "4"))
+        self.segment_dir = f"{hdfs.base_path}/segments"
+        self.packed_prefix = f"{hdfs.base_path}/photos/"
+        self.heartbeat_interval = float(os.getenv("HDFS_SEGMENT_HEARTBEAT_SECONDS", "60"))
+        self.owner_timeout = float(os.getenv("HDFS_SEGMENT_OWNER_TIMEOUT_MINUTES", "10"))
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._writers: Optional[asyncio.Queue] = None
+        self._active_paths = set()
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    def handles(self, hdfs_path: str) -> bool:
+        return self.enabled and hdfs_path.startswith(self.packed_prefix)
+
+    async def lookup(self, hdfs_path: str) -> Optional[dict]:
+        db = get_database()
+        return await db[self.objects].find_one({"_id": hdfs_path})
+
+    def _writer_queue(self) -> asyncio.Queue:
+        if self._writers is None:
+            self._writers = asyncio.Queue()
+            for _ in range(self.writer_count):
+                self._writers.put_nowait(SegmentWriter())
+        if self._heartbeat is None:
+            self._heartbeat = asyncio.create_task(self._run_heartbeat())
+        return self._writers
+
+    async def _run_heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if not self._active_paths:
+                continue
+            try:
+                db = get_database()
+                await db[self.segments].update_many(
+                    {"_id": {"$in": list(self._active_paths)}},
+                    {"$set": {"heartbeat_at": datetime.utcnow()}}
+                )
+            except Exception as e:
+                logger.warning(f"Failed to refresh segment heartbeat: {str(e)}")
+
+    async def close(self):
+        """Seal this process's open segments so compaction can take them"""
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        if not self._active_paths:
+            return
+        paths = list(self._active_paths)
+        self._active_paths.clear()
+        try:
+            db = get_database()
+            await db[self.segments].update_many({"_id": {"$in": paths}}, {"$set": {"sealed": True}})
+            logger.info(f"Sealed {len(paths)} open HDFS segments")
+        except Exception as e:
+            # Left unsealed, they become compactable once the heartbeat goes stale
+            logger.warning(f"Failed to seal open segments on shutdown: {str(e)}")
+
+    async def _open_segment(self, writer: SegmentWriter):
+        db = get_database()
+        if writer.path:
+            self._active_paths.discard(writer.path)
+            await db[self.segments].update_one({"_id": writer.path}, {"$set": {"sealed": True}})
+
+        now = datetime.utcnow()
+        path = (
+            f"{self.segment_dir}/{now.strftime('%Y%m%d')}/"
+            f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.seg"
+        )
+        await self.hdfs._run(self.hdfs.create_empty_file, path)
+        await db[self.segments].insert_one({
+            "_id": path,
+            "size": 0,
+            "live_bytes": 0,
+            "dead_bytes": 0,
+            "sealed": False,
+            "owner": self.owner,
+            "heartbeat_at": now,
+            "created_at": now,
+            "updated_at": now
+        })
+        writer.path = path
+        writer.size = 0
+        self._active_paths.add(path)
+        logger.info(f"Opened HDFS segment {path}")
+
+    async def _resync(self, writer: SegmentWriter, expected_size: int):
+        """Account for bytes left behind by a failed append"""
+        db = get_database()
+        try:
+            status = await self.hdfs.stat_file_async(writer.path)
+        except Exception:
+            status = None
+        if not status:
+            self._active_paths.discard(writer.path)
+            writer.path = None
+            return
+
+        garbage = status.get("length", 0) - expected_size
+        writer.size = status.get("length", 0)
+        if garbage > 0:
+            await db[self.segments].update_one(
+                {"_id": writer.path}, {"$inc": {"size": garbage, "dead_bytes": garbage}}
+            )
+
+    async def _mark_dead(self, location: dict):
+        db = get_database()
+        await db[self.segments].update_one(
+            {"_id": location["segment"]},
+            {"$inc": {"live_bytes": -location["length"], "dead_bytes": location["length"]}}
+        )
+
+    async def _put(self, hdfs_path: str, append, expected: Optional[dict] = None) -> dict:
+        """
+        Append one object to a segment and point the index at it
+
+        `append(segment_path)` runs on the HDFS pool and returns the number
+        of bytes written. When `expected` is given the index is only updated
+        if the object still lives there (used by compaction).
+        """
+        db = get_database()
+        writers = self._writer_queue()
+        writer = await writers.get()
+        try:
+            if writer.path is None or writer.size >= self.segment_max:
+                await self._open_segment(writer)
+
+            offset = writer.size
+            try:
+                length = await self.hdfs._run(append, writer.path)
+            except Exception:
+                await self._resync(writer, offset)
+                raise
+            writer.size += length
+
+            location = {
+                "segment": writer.path,
+                "offset": offset,
+                "length": length,
+                "created_at": datetime.utcnow()
+            }
+            await db[self.segments].update_one(
+                {"_id": writer.path},
+                {"$inc": {"size": length, "live_bytes": length}, "$set": {"updated_at": location["created_at"]}}
+            )
+        finally:
+            writers.put_nowait(writer)
+
+        if expected is None:
+            previous = await db[self.objects].find_one_and_replace(
+                {"_id": hdfs_path}, location, upsert=True, return_document=ReturnDocument.BEFORE
+            )
+            if previous:
+                await self._mark_dead(previous)
+        else:
+            moved = await db[self.objects].find_one_and_replace(
+                {"_id": hdfs_path, "segment": expected["segment"], "offset": expected["offset"]},
+                location
+            )
+            if moved is None:
+                # Deleted or rewritten while we were copying it
+                await self._mark_dead(location)
+        return location
+
+    async def put_bytes(self, hdfs_path: str, data: bytes, expected: Optional[dict] = None) -> dict:
+        def append(segment_path: str) -> int:
+            self.hdfs.append_file(segment_path, data)
+            return len(data)
+
+        return await self._put(hdfs_path, append, expected)
+
+    async def put_stream(self, hdfs_path: str, source: BinaryIO, max_size: int, require_image: bool = True) -> dict:
+        upload = {"hdfs_path": hdfs_path, "size": 0, "sha256": None, "content_type": None}
+
+        def append(segment_path: str) -> int:
+            chunks = iter_upload_chunks(source, max_size, upload, self.hdfs.chunk_size, require_image)
+            self.hdfs.append_file(segment_path, chunks)
+            return upload["size"]
+
+        await self._put(hdfs_path, append)
+        return upload
+
+    async def read(self, location: dict) -> bytes:
+        return await self.hdfs._run(
+            self.hdfs.read_range, location["segment"], location["offset"], location["length"]
+        )
+
+    async def delete(self, hdfs_path: str) -> bool:
+        db = get_database()
+        location = await db[self.objects].find_one_and_delete({"_id": hdfs_path})
+        if not location:
+            return False
+        await self._mark_dead(location)
+        return True
+
+    async def compact(self, min_dead_ratio: float = 0.5, idle_minutes: int = 60, grace_minutes: int = 30) -> dict:
+        """
+        Rewrite segments that are mostly dead bytes
+
+        Live objects of an idle segment are appended to the active segments
+        and re-pointed; the old segment is marked retired and only deleted
+        from HDFS on a later run, once in-flight readers are done with it.
+        """
+        db = get_database()
+        now = datetime.utcnow()
+        report = {"segments_compacted": 0, "objects_moved": 0, "bytes_reclaimed": 0, "segments_deleted": 0}
+
+        async for segment in db[self.segments].find(
+            {"retired_at": {"$lt": now - timedelta(minutes=grace_minutes)}}
+        ):
+            await self.hdfs.delete_file_async(segment["_id"])
+            await db[self.segments].delete_one({"_id": segment["_id"]})
+            report["segments_deleted"] += 1
+
+        # Sealed segments, or open ones whose owner stopped heartbeating:
+        # a live owner may still append to its segment however long it has
+        # been idle
+        candidates = db[self.segments].find({
+            "retired_at": {"$exists": False},
+            "updated_at": {"$lt": now - timedelta(minutes=idle_minutes)},
+            "$or": [
+                {"sealed": True},
+                {"heartbeat_at": {"$lt": now - timedelta(minutes=self.owner_timeout)}},
+            ]
+        })
+        async for segment in candidates:
+            if segment["_id"] in self._active_paths or not segment.get("size"):
+                continue
+            if segment.get("dead_bytes", 0) / segment["size"] < min_dead_ratio:
+                continue
+
+            async for location in db[self.objects].find({"segment": segment["_id"]}):
+                data = await self.read(location)
+                await self.put_bytes(location["_id"], data, expected=location)
+                report["objects_moved"] += 1
+
+            await db[self.segments].update_one(
+                {"_id": segment["_id"]}, {"$set": {"retired_at": datetime.utcnow(), "live_bytes": 0}}
+            )
+            report["segments_compacted"] += 1
+            report["bytes_reclaimed"] += segment.get("dead_bytes", 0)
+
+        logger.info(f"Segment compaction finished: {report}")
+        return report
+
+
+if __name__ == "__main__":
+    from app.db import init_db
+    from app.services.hdfs_service import hdfs_service
+
+    async def main():
+        await init_db()
+        await hdfs_service.connect_async()
+        print(await hdfs_service.segments.compact())
+
+    asyncio.run(main())
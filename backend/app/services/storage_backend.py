@@ -0,0 +1,314 @@
+# backend/app/services/storage_backend.py
+import os
+import uuid
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Optional
+from fastapi import HTTPException
+from app.services.upload_admission import upload_admission
+from app.utils.upload_utils import DEFAULT_CHUNK_SIZE, iter_upload_chunks
+
+logger = logging.getLogger(__name__)
+
+BASE_PATH = "/travel_journal"
+
+
+class StorageBackend(ABC):
+    """
+    Interface shared by every place the app stores file bytes
+
+    Paths are logical, slash-separated and rooted at base_path, so the same
+    path stored in Mongo resolves on every backend.
+    """
+
+    name = "base"
+    base_path = BASE_PATH
+
+    def available(self) -> bool:
+        return True
+
+    async def connect(self) -> bool:
+        return True
+
+    @abstractmethod
+    async def write_stream(self, path: str, source: BinaryIO, max_size: int, require_image: bool = True) -> dict:
+        """
+        Stream an upload spool to path, enforcing max_size as it goes
+
+        Returns:
+            Dict with path, size, sha256 and content_type
+        """
+
+    @abstractmethod
+    async def write_bytes(self, path: str, data: bytes):
+        ...
+
+    @abstractmethod
+    async def append(self, path: str, data: bytes):
+        ...
+
+    @abstractmethod
+    async def read(self, path: str) -> bytes:
+        ...
+
+    @abstractmethod
+    async def stat(self, path: str) -> Optional[dict]:
+        """Return {"length": size} or None if the path does not exist"""
+
+    @abstractmethod
+    async def open_stream(self, path: str, offset: int = 0, length: Optional[int] = None):
+        """
+        Open a file (or a byte range of it) for streaming
+
+        A missing path raises here rather than after response headers
+        have been sent.
+        """
+
+    @abstractmethod
+    async def delete(self, path: str) -> bool:
+        ...
+
+    def local_file(self, path: str) -> Optional[str]:
+        """Filesystem path that can be sent with sendfile, if the backend has one"""
+        return None
+
+    async def close(self):
+        """Async cleanup that must run on the event loop, before shutdown()"""
+        pass
+
+    def shutdown(self):
+        pass
+
+
+class HDFSBackend(StorageBackend):
+    """WebHDFS storage; small photo objects are packed into segments by the HDFS service"""
+
+    name = "hdfs"
+
+    def __init__(self):
+        from app.services.hdfs_service import hdfs_service
+        self.hdfs = hdfs_service
+        self.base_path = hdfs_service.base_path
+
+    def available(self) -> bool:
+        return self.hdfs.client is not None
+
+    async def connect(self) -> bool:
+        return await self.hdfs.connect_async()
+
+    async def write_stream(self, path: str, source: BinaryIO, max_size: int, require_image: bool = True) -> dict:
+        # Uploads fail fast when HDFS is saturated; the client retries
+        async with upload_admission.write_slot():
+            upload = await self.hdfs.write_stream_async(path, source, max_size, require_image)
+        upload["path"] = upload.pop("hdfs_path")
+        return upload
+
+    async def write_bytes(self, path: str, data: bytes):
+        async with upload_admission.write_slot(fail_fast=False):
+            await self.hdfs.write_file_async(path, data)
+
+    async def append(self, path: str, data: bytes):
+        async with upload_admission.write_slot(fail_fast=False):
+            await self.hdfs.append_file_async(path, data)
+
+    async def read(self, path: str) -> bytes:
+        return await self.hdfs.read_file_async(path)
+
+    async def stat(self, path: str) -> Optional[dict]:
+        return await self.hdfs.stat_file_async(path)
+
+    async def open_stream(self, path: str, offset: int = 0, length: Optional[int] = None):
+        return await self.hdfs.open_stream_async(path, offset=offset, length=length)
+
+    async def delete(self, path: str) -> bool:
+        return await self.hdfs.delete_file_async(path)
+
+    async def close(self):
+        await self.hdfs.segments.close()
+
+    def shutdown(self):
+        self.hdfs.shutdown()
+
+
+class LocalBackend(StorageBackend):
+    """
+    Local filesystem storage for single-node and development deployments
+
+    Writes go to a temporary file that is renamed into place, so readers
+    never see a partial file. Files are served straight from disk.
+    """
+
+    name = "local"
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = os.path.abspath(root or os.getenv("STORAGE_LOCAL_ROOT", "storage"))
+        self.chunk_size = int(os.getenv("STORAGE_CHUNK_SIZE", str(DEFAULT_CHUNK_SIZE)))
+
+    def _resolve(self, path: str) -> str:
+        full_path = os.path.normpath(os.path.join(self.root, path.lstrip("/")))
+        if not full_path.startswith(self.root + os.sep):
+            raise HTTPException(status_code=400, detail="Invalid storage path")
+        return full_path
+
+    def _write_stream(self, path: str, source: BinaryIO, max_size: int, require_image: bool) -> dict:
+        full_path = self._resolve(path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        temp_path = f"{full_path}.{uuid.uuid4().hex[:8]}.part"
+        upload = {"path": path, "size": 0, "sha256": None, "content_type": None}
+        try:
+            with open(temp_path, "wb") as f:
+                for chunk in iter_upload_chunks(source, max_size, upload, self.chunk_size, require_image):
+                    f.write(chunk)
+            os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return upload
+
+    def _write_bytes(self, path: str, data: bytes):
+        full_path = self._resolve(path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        temp_path = f"{full_path}.{uuid.uuid4().hex[:8]}.part"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, full_path)
+
+    def _append(self, path: str, data: bytes):
+        full_path = self._resolve(path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "ab") as f:
+            f.write(data)
+
+    def _read(self, path: str) -> bytes:
+        try:
+            with open(self._resolve(path), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="File not found")
+
+    def _stat(self, path: str) -> Optional[dict]:
+        try:
+            return {"length": os.stat(self._resolve(path)).st_size, "type": "FILE"}
+        except FileNotFoundError:
+            return None
+
+    def _open(self, path: str, offset: int):
+        try:
+            f = open(self._resolve(path), "rb")
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="File not found")
+        f.seek(offset)
+        return f
+
+    def _delete(self, path: str) -> bool:
+        try:
+            os.remove(self._resolve(path))
+            return True
+        except FileNotFoundError:
+            return False
+
+    async def write_stream(self, path: str, source: BinaryIO, max_size: int, require_image: bool = True) -> dict:
+        return await asyncio.to_thread(self._write_stream, path, source, max_size, require_image)
+
+    async def write_bytes(self, path: str, data: bytes):
+        await asyncio.to_thread(self._write_bytes, path, data)
+
+    async def append(self, path: str, data: bytes):
+        await asyncio.to_thread(self._append, path, data)
+
+    async def read(self, path: str) -> bytes:
+        return await asyncio.to_thread(self._read, path)
+
+    async def stat(self, path: str) -> Optional[dict]:
+        return await asyncio.to_thread(self._stat, path)
+
+    async def open_stream(self, path: str, offset: int = 0, length: Optional[int] = None):
+        f = await asyncio.to_thread(self._open, path, offset)
+        return self._iter_file(f, length)
+
+    async def _iter_file(self, f, length: Optional[int]):
+        remaining = length
+        try:
+            while remaining is None or remaining > 0:
+                size = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+                chunk = await asyncio.to_thread(f.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            f.close()
+
+    async def delete(self, path: str) -> bool:
+        return await asyncio.to_thread(self._delete, path)
+
+    def local_file(self, path: str) -> Optional[str]:
+        full_path = self._resolve(path)
+        return full_path if os.path.isfile(full_path) else None
+
+
+class MemoryBackend(StorageBackend):
+    """In-process storage for benchmarks and tests; contents are lost on restart"""
+
+    name = "memory"
+
+    def __init__(self):
+        self.files: dict = {}
+
+    def _get(self, path: str) -> bytes:
+        data = self.files.get(path)
+        if data is None:
+            raise HTTPException(status_code=404, detail="File not found")
+        return data
+
+    async def write_stream(self, path: str, source: BinaryIO, max_size: int, require_image: bool = True) -> dict:
+        upload = {"path": path, "size": 0, "sha256": None, "content_type": None}
+        chunks = iter_upload_chunks(source, max_size, upload, require_image=require_image)
+        self.files[path] = await asyncio.to_thread(b"".join, chunks)
+        return upload
+
+    async def write_bytes(self, path: str, data: bytes):
+        self.files[path] = bytes(data)
+
+    async def append(self, path: str, data: bytes):
+        self.files[path] = self.files.get(path, b"") + data
+
+    async def read(self, path: str) -> bytes:
+        return self._get(path)
+
+    async def stat(self, path: str) -> Optional[dict]:
+        data = self.files.get(path)
+        return None if data is None else {"length": len(data), "type": "FILE"}
+
+    async def open_stream(self, path: str, offset: int = 0, length: Optional[int] = None):
+        data = self._get(path)
+        end = len(data) if length is None else offset + length
+        return self._iter_bytes(data[offset:end])
+
+    async def _iter_bytes(self, data: bytes):
+        for start in range(0, len(data), DEFAULT_CHUNK_SIZE):
+            yield data[start:start + DEFAULT_CHUNK_SIZE]
+
+    async def delete(self, path: str) -> bool:
+        return self.files.pop(path, None) is not None
+
+
+BACKENDS = {
+    "hdfs": HDFSBackend,
+    "local": LocalBackend,
+    "memory": MemoryBackend,
+}
+
+
+def create_backend(name: Optional[str] = None) -> StorageBackend:
+    name = (name or os.getenv("STORAGE_BACKEND", "hdfs")).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown STORAGE_BACKEND {name!r}, expected one of {sorted(BACKENDS)}")
+    logger.info(f"Using {name} storage backend")
+    return BACKENDS[name]()
+
+
+storage = create_backend()
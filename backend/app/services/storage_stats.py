@@ -0,0 +1,192 @@
+# backend/app/services/storage_stats.py
+import os
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+from pymongo import UpdateOne
+from app.db import get_database
+from app.services.storage_backend import storage
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_ID = "global"
+
+
+class StorageStats:
+    """
+    Photo storage counters maintained on upload and delete
+
+    `storage_stats` holds one global document and `storage_usage` one
+    document per user, so reading stats is a constant-time lookup. A
+    periodic reconciliation recomputes them from Mongo (and HDFS
+    content summaries when on HDFS) to correct any drift.
+    """
+
+    stats_collection = "storage_stats"
+    usage_collection = "storage_usage"
+
+    def __init__(self):
+        self.reconcile_interval = float(os.getenv("STORAGE_RECONCILE_MINUTES", "60")) * 60
+        self._task: Optional[asyncio.Task] = None
+
+    async def record_upload(self, user_id: str, size: int, stored_bytes: int, count: int = 1):
+        """
+        Count new photos; stored_bytes is what actually landed in storage (0 when deduplicated)
+
+        A batch import passes its totals and the number of photos as count.
+        """
+        db = get_database()
+        now = datetime.utcnow()
+        await db[self.stats_collection].update_one(
+            {"_id": GLOBAL_ID},
+            {"$inc": {"photo_count": count, "total_photo_size": size, "stored_bytes": stored_bytes},
+             "$set": {"updated_at": now}},
+            upsert=True
+        )
+        await db[self.usage_collection].update_one(
+            {"_id": user_id},
+            {"$inc": {"photo_count": count, "bytes": size}, "$set": {"updated_at": now}},
+            upsert=True
+        )
+
+    async def record_delete(self, user_id: str, size: int, freed_bytes: int):
+        """Uncount a photo; freed_bytes is what left storage among bytes counted in stored_bytes"""
+        db = get_database()
+        now = datetime.utcnow()
+        await db[self.stats_collection].update_one(
+            {"_id": GLOBAL_ID},
+            {"$inc": {"photo_count": -1, "total_photo_size": -size, "stored_bytes": -freed_bytes},
+             "$set": {"updated_at": now}},
+            upsert=True
+        )
+        await db[self.usage_collection].update_one(
+            {"_id": user_id},
+            {"$inc": {"photo_count": -1, "bytes": -size}, "$set": {"updated_at": now}}
+        )
+
+    async def get_stats(self, top_users: int = 10) -> dict:
+        db = get_database()
+        stats = await db[self.stats_collection].find_one({"_id": GLOBAL_ID}) or {}
+        top = await db[self.usage_collection].find().sort("bytes", -1).limit(top_users).to_list(top_users)
+        return {
+            "backend": storage.name,
+            "status": "connected" if storage.available() else "disconnected",
+            "hdfs_capacity": stats.get("hdfs_capacity", 0),
+            "hdfs_used": stats.get("hdfs_used", 0),
+            "hdfs_remaining": stats.get("hdfs_remaining", 0),
+            "photos_count": stats.get("photo_count", 0),
+            "total_photo_size": stats.get("total_photo_size", 0),
+            "stored_bytes": stats.get("stored_bytes", 0),
+            "hdfs_photo_bytes": stats.get("hdfs_photo_bytes", 0),
+            "top_users": [
+                {"user_id": u["_id"], "photo_count": u.get("photo_count", 0), "bytes": u.get("bytes", 0)}
+                for u in top
+            ],
+            "updated_at": stats.get("updated_at"),
+            "reconciled_at": stats.get("reconciled_at"),
+            "base_path": storage.base_path
+        }
+
+    async def get_user_usage(self, user_id: str) -> dict:
+        db = get_database()
+        usage = await db[self.usage_collection].find_one({"_id": user_id}) or {}
+        return {"user_id": user_id, "photo_count": usage.get("photo_count", 0), "bytes": usage.get("bytes", 0)}
+
+    async def reconcile(self) -> dict:
+        """Recompute all counters from the trips, blobs and HDFS, returning the drift found"""
+        db = get_database()
+        now = datetime.utcnow()
+
+        before = await db[self.stats_collection].find_one({"_id": GLOBAL_ID}) or {}
+
+        usage_ops = []
+        photo_count = 0
+        total_size = 0
+        pipeline = [
+            {"$match": {"photo_hdfs_path": {"$exists": True}}},
+            {"$group": {"_id": "$user_id", "photo_count": {"$sum": 1}, "bytes": {"$sum": "$photo_size"}}}
+        ]
+        async for row in db["trips"].aggregate(pipeline):
+            photo_count += row["photo_count"]
+            total_size += row["bytes"]
+            usage_ops.append(UpdateOne(
+                {"_id": row["_id"]},
+                {"$set": {"photo_count": row["photo_count"], "bytes": row["bytes"], "updated_at": now}},
+                upsert=True
+            ))
+        if usage_ops:
+            await db[self.usage_collection].bulk_write(usage_ops, ordered=False)
+
+        # Rows the aggregation didn't touch belong to users without photos,
+        # unless an upload landed after it ran; only drop rows that still
+        # have no trips behind them
+        stale = db[self.usage_collection].find({"updated_at": {"$lt": now}}, {"_id": 1})
+        async for row in stale:
+            has_photos = await db["trips"].find_one(
+                {"user_id": row["_id"], "photo_hdfs_path": {"$exists": True}}, {"_id": 1}
+            )
+            if not has_photos:
+                await db[self.usage_collection].delete_one({"_id": row["_id"], "updated_at": {"$lt": now}})
+
+        stored_bytes = 0
+        async for row in db["photo_blobs"].aggregate([{"$group": {"_id": None, "bytes": {"$sum": "$size"}}}]):
+            stored_bytes = row["bytes"]
+
+        update = {
+            "photo_count": photo_count,
+            "total_photo_size": total_size,
+            "stored_bytes": stored_bytes,
+            "reconciled_at": now,
+            "updated_at": now
+        }
+
+        if storage.name == "hdfs" and storage.available():
+            hdfs_service = storage.hdfs
+            try:
+                summary = await hdfs_service.content_summary_async(hdfs_service.base_path)
+                photos = await hdfs_service.content_summary_async(f"{hdfs_service.base_path}/photos")
+                segments = await hdfs_service.content_summary_async(f"{hdfs_service.base_path}/segments")
+                update["hdfs_used"] = summary.get("spaceConsumed", 0)
+                update["hdfs_photo_bytes"] = photos.get("length", 0) + segments.get("length", 0)
+                if summary.get("spaceQuota", -1) > 0:
+                    update["hdfs_capacity"] = summary["spaceQuota"]
+                    update["hdfs_remaining"] = summary["spaceQuota"] - summary.get("spaceConsumed", 0)
+                else:
+                    # No quota on the app directory: report the whole filesystem
+                    status = await hdfs_service.fs_status_async()
+                    update["hdfs_capacity"] = status["capacity"]
+                    update["hdfs_remaining"] = status["remaining"]
+            except Exception as e:
+                logger.warning(f"HDFS content summary failed during reconciliation: {str(e)}")
+
+        await db[self.stats_collection].update_one({"_id": GLOBAL_ID}, {"$set": update}, upsert=True)
+
+        drift = {
+            "photo_count": photo_count - before.get("photo_count", 0),
+            "total_photo_size": total_size - before.get("total_photo_size", 0),
+            "stored_bytes": stored_bytes - before.get("stored_bytes", 0)
+        }
+        if any(drift.values()):
+            logger.warning(f"Storage stats drift corrected: {drift}")
+        return drift
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Storage stats reconciliation failed: {str(e)}")
+
+    async def start(self):
+        if self._task is None and self.reconcile_interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+storage_stats = StorageStats()
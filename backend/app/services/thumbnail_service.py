@@ -0,0 +1,185 @@
+# backend/app/services/thumbnail_service.py
+import io
+import os
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from app.db import get_database
+from app.services.storage_backend import storage
+from app.services.upload_admission import upload_admission
+
+logger = logging.getLogger(__name__)
+
+# Bounding boxes, smallest first so the grid view is ready earliest
+RENDITION_SIZES = {
+    "grid": (300, 300),
+    "card": (800, 800),
+    "full": (2048, 2048),
+}
+
+RENDITION_FORMATS = {
+    "webp": {"format": "WEBP", "extension": "webp", "content_type": "image/webp",
+             "options": {"quality": 80, "method": 4}},
+    "jpeg": {"format": "JPEG", "extension": "jpg", "content_type": "image/jpeg",
+             "options": {"quality": 85, "optimize": True, "progressive": True}},
+}
+
+
+def render_renditions(photo_data: bytes) -> dict:
+    """
+    Decode a photo once and encode every rendition
+
+    Runs inside a worker process, so it only takes and returns plain data.
+
+    Returns:
+        Dict keyed by "{size}_{format}" with data, width, height and content_type
+    """
+    from PIL import Image, ImageOps
+
+    image = Image.open(io.BytesIO(photo_data))
+    # Let the JPEG decoder downscale while decoding instead of after
+    image.draft("RGB", max(RENDITION_SIZES.values()))
+    image = ImageOps.exif_transpose(image)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    renditions = {}
+    # Shrink largest to smallest so each step resizes the previous result
+    for name, box in sorted(RENDITION_SIZES.items(), key=lambda item: item[1], reverse=True):
+        image.thumbnail(box, Image.LANCZOS)
+        for fmt, spec in RENDITION_FORMATS.items():
+            buffer = io.BytesIO()
+            image.save(buffer, format=spec["format"], **spec["options"])
+            renditions[f"{name}_{fmt}"] = {
+                "data": buffer.getvalue(),
+                "width": image.width,
+                "height": image.height,
+                "content_type": spec["content_type"],
+            }
+    return renditions
+
+
+class ThumbnailService:
+    """Generates photo renditions on a process pool after upload"""
+
+    def __init__(self):
+        self.max_workers = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+        self.memory_factor = int(os.getenv("THUMBNAIL_MEMORY_FACTOR", "8"))
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    @staticmethod
+    def rendition_keys() -> list:
+        return [f"{name}_{fmt}" for name in RENDITION_SIZES for fmt in RENDITION_FORMATS]
+
+    def pending_renditions(self) -> dict:
+        """Initial rendition state stored on a freshly uploaded trip"""
+        return {key: {"status": "pending"} for key in self.rendition_keys()}
+
+    @staticmethod
+    def rendition_path(original_path: str, key: str) -> str:
+        name, fmt = key.rsplit("_", 1)
+        stem = os.path.splitext(original_path.replace("/original/", "/renditions/"))[0]
+        return f"{stem}_{name}.{RENDITION_FORMATS[fmt]['extension']}"
+
+    async def shared_renditions(self, hdfs_path: str) -> Optional[dict]:
+        """Reuse renditions already rendered for a deduplicated photo, if all are ready"""
+        db = get_database()
+        sibling = await db["trips"].find_one(
+            {"photo_hdfs_path": hdfs_path, "renditions": {"$exists": True}},
+            {"renditions": 1}
+        )
+        if not sibling:
+            return None
+        renditions = sibling["renditions"]
+        if all(r.get("status") == "ready" for r in renditions.values()):
+            return renditions
+        return None
+
+    async def process(self, trip_id: str, hdfs_path: str):
+        """
+        Render all renditions of a trip photo and record each one as it lands
+
+        State is written to every trip sharing the stored photo, since
+        deduplicated uploads point at the same original.
+        """
+        db = get_database()
+        photo_filter = {"photo_hdfs_path": hdfs_path}
+
+        try:
+            # Decoded pixels take several times the encoded size; wait for
+            # that much upload budget rather than competing with uploads
+            status = await storage.stat(hdfs_path)
+            estimate = (status or {}).get("length", 0) * self.memory_factor
+            async with upload_admission.hold(estimate):
+                photo_data = await storage.read(hdfs_path)
+                loop = asyncio.get_running_loop()
+                renditions = await loop.run_in_executor(self._get_pool(), render_renditions, photo_data)
+        except Exception as e:
+            logger.error(f"Rendition pipeline failed for trip {trip_id}: {str(e)}")
+            await db["trips"].update_many(
+                photo_filter,
+                {"$set": {f"renditions.{key}.status": "failed" for key in self.rendition_keys()}}
+            )
+            return
+        del photo_data
+
+        for key in self.rendition_keys():
+            rendition = renditions.pop(key)
+            path = self.rendition_path(hdfs_path, key)
+            try:
+                await storage.write_bytes(path, rendition["data"])
+                state = {
+                    "status": "ready",
+                    "path": path,
+                    "size": len(rendition["data"]),
+                    "width": rendition["width"],
+                    "height": rendition["height"],
+                    "content_type": rendition["content_type"],
+                }
+            except Exception as e:
+                logger.warning(f"Failed to store rendition {path}: {str(e)}")
+                state = {"status": "failed"}
+
+            result = await db["trips"].update_many(
+                photo_filter, {"$set": {f"renditions.{key}": state}}
+            )
+            if result.matched_count == 0:
+                # Trip was deleted while rendering; don't leave orphans behind
+                logger.info(f"Trip {trip_id} deleted during rendering, discarding renditions")
+                for orphan_key in self.rendition_keys():
+                    await storage.delete(self.rendition_path(hdfs_path, orphan_key))
+                return
+
+    def select_rendition(self, trip: dict, size: str, accept: str) -> Optional[dict]:
+        """
+        Pick the best ready rendition for a request
+
+        Only the requested size or larger ones are considered, preferring
+        WebP when the client accepts it. Returns None if nothing is ready.
+        """
+        renditions = trip.get("renditions") or {}
+        names = list(RENDITION_SIZES)
+        if size not in names:
+            return None
+
+        formats = ["webp", "jpeg"] if "image/webp" in (accept or "") else ["jpeg"]
+        for name in names[names.index(size):]:
+            for fmt in formats:
+                rendition = renditions.get(f"{name}_{fmt}")
+                if rendition and rendition.get("status") == "ready":
+                    return rendition
+        return None
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+thumbnail_service = ThumbnailService()
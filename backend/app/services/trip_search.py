@@ -0,0 +1,169 @@
+# backend/app/services/trip_search.py
+import os
+import time
+import asyncio
+import logging
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Optional
+from app.db import get_database
+from app.utils.trip_views import trip_summary_projection
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 50
+MAX_QUERY_LENGTH = 200
+
+
+def normalize_query(query: str) -> str:
+    return " ".join((query or "").lower().split())[:MAX_QUERY_LENGTH]
+
+
+class TripSearch:
+    """
+    Ranked search over trip place names, countries and descriptions
+
+    Matching uses the trips text index (place_name weighted above country,
+    country above description). Only the best SEARCH_CANDIDATES matches by
+    text score are fetched; they are re-ranked by blending that score with
+    recency and the ranked list is cached, so every later page of the same
+    query is a slice of memory.
+
+    The most frequent queries are kept warm: a background task re-runs
+    them before their cache entries expire, so popular searches never pay
+    for the index scan on the request path. Only queries that found
+    something are counted, and at most SEARCH_TRACKED_QUERIES of them are
+    tracked; past that the least frequent half is dropped.
+    """
+
+    def __init__(self):
+        self.candidates = int(os.getenv("SEARCH_CANDIDATES", "500"))
+        self.half_life_days = float(os.getenv("SEARCH_RECENCY_HALF_LIFE_DAYS", "180"))
+        self.recency_weight = float(os.getenv("SEARCH_RECENCY_WEIGHT", "0.3"))
+        self.cache_ttl = float(os.getenv("SEARCH_CACHE_SECONDS", "60"))
+        self.cache_entries = int(os.getenv("SEARCH_CACHE_ENTRIES", "1000"))
+        self.warm_queries = int(os.getenv("SEARCH_WARM_QUERIES", "50"))
+        self.tracked_queries = max(int(os.getenv("SEARCH_TRACKED_QUERIES", "1000")), self.warm_queries)
+        self._cache: OrderedDict = OrderedDict()
+        self._frequency: Counter = Counter()
+        self._task: Optional[asyncio.Task] = None
+        self.metrics = {"hits": 0, "misses": 0, "warmed": 0}
+
+    def _rank(self, trips: list) -> list:
+        """Blend text relevance with an exponential recency decay"""
+        if not trips:
+            return trips
+        now = datetime.utcnow()
+        best = max(trip["score"] for trip in trips) or 1.0
+        for trip in trips:
+            age_days = max((now - trip["created_at"]).total_seconds() / 86400, 0) if trip.get("created_at") else 0
+            recency = 0.5 ** (age_days / self.half_life_days) if self.half_life_days > 0 else 0.0
+            trip["score"] = round(
+                (1 - self.recency_weight) * trip["score"] / best + self.recency_weight * recency, 6
+            )
+        trips.sort(key=lambda trip: trip["score"], reverse=True)
+        return trips
+
+    async def _fetch(self, query: str) -> list:
+        db = get_database()
+        pipeline = [
+            {"$match": {"$text": {"$search": query}}},
+            {"$sort": {"score": {"$meta": "textScore"}}},
+            {"$limit": self.candidates},
+            {"$project": {
+                **trip_summary_projection(),
+                "description": 1,
+                "score": {"$meta": "textScore"}
+            }},
+        ]
+        return self._rank(await db["trips"].aggregate(pipeline).to_list(self.candidates))
+
+    def _store(self, query: str, results: list):
+        self._cache[query] = (time.monotonic() + self.cache_ttl, results)
+        self._cache.move_to_end(query)
+        while len(self._cache) > self.cache_entries:
+            self._cache.popitem(last=False)
+
+    async def search(self, query: str, page: int = 1, limit: int = 20) -> dict:
+        """
+        One page of ranked results
+
+        Returns:
+            Dict with trips, total (capped at SEARCH_CANDIDATES), page and has_more
+        """
+        query = normalize_query(query)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        page = max(1, page)
+        if not query:
+            return {"trips": [], "total": 0, "page": page, "has_more": False}
+
+        cached = self._cache.get(query)
+        if cached and cached[0] > time.monotonic():
+            self._cache.move_to_end(query)
+            self.metrics["hits"] += 1
+            results = cached[1]
+        else:
+            self.metrics["misses"] += 1
+            results = await self._fetch(query)
+            self._store(query, results)
+        if results:
+            self._track(query)
+
+        start = (page - 1) * limit
+        return {
+            "trips": results[start:start + limit],
+            "total": len(results),
+            "page": page,
+            "has_more": start + limit < len(results),
+        }
+
+    def _track(self, query: str):
+        self._frequency[query] += 1
+        if len(self._frequency) > self.tracked_queries:
+            self._frequency = Counter(dict(self._frequency.most_common(self.tracked_queries // 2)))
+
+    def remove_trip(self, trip_id: str):
+        """Drop a deleted trip from cached results"""
+        for query, (expires_at, results) in list(self._cache.items()):
+            if any(trip["_id"] == trip_id for trip in results):
+                self._cache[query] = (expires_at, [trip for trip in results if trip["_id"] != trip_id])
+
+    async def warm(self):
+        """Refresh cache entries of the most frequent queries"""
+        for query, _ in self._frequency.most_common(self.warm_queries):
+            try:
+                self._store(query, await self._fetch(query))
+                self.metrics["warmed"] += 1
+            except Exception as e:
+                logger.warning(f"Failed to warm search '{query}': {str(e)}")
+        # Decay so yesterday's popular queries make room for today's
+        self._frequency = Counter({query: count // 2 for query, count in self._frequency.items() if count > 1})
+
+    async def _run(self):
+        # Refresh a little before entries expire
+        interval = max(self.cache_ttl * 0.8, 1.0)
+        while True:
+            await asyncio.sleep(interval)
+            await self.warm()
+
+    async def start(self):
+        if self._task is None and self.warm_queries > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "hit_rate": round(self.metrics["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": len(self._cache),
+            "tracked_queries": len(self._frequency),
+            "top_queries": self._frequency.most_common(10),
+        }
+
+
+trip_search = TripSearch()
@@ -0,0 +1,203 @@
+# backend/app/services/upload_admission.py
+import os
+import json
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# Request bodies that are photos or archives of them
+UPLOAD_PATHS = ("/api/trips/upload", "/api/trips/import", "/api/travel_logs/upload")
+
+
+class UploadAdmission:
+    """
+    Per-worker admission control for uploads and storage writes
+
+    Upload requests reserve their Content-Length against
+    UPLOAD_MEMORY_BUDGET_MB before the body is read and give it back once
+    the body has been received; when the budget is spent they are turned away
+    at once with 503 + Retry-After instead of piling up. Background work
+    (rendition decoding) waits for budget instead of failing.
+
+    Storage writes run at most STORAGE_WRITE_CONCURRENCY at a time. A
+    request-path write that would wait behind STORAGE_WRITE_QUEUE_MAX
+    others fails fast the same way.
+    """
+
+    def __init__(self):
+        self.memory_budget = int(float(os.getenv("UPLOAD_MEMORY_BUDGET_MB", "256")) * 1024 * 1024)
+        self.write_concurrency = int(os.getenv("STORAGE_WRITE_CONCURRENCY", "4"))
+        self.max_write_queue = int(os.getenv("STORAGE_WRITE_QUEUE_MAX", "16"))
+        self.retry_after = int(os.getenv("UPLOAD_RETRY_AFTER_SECONDS", "2"))
+        self._reserved = 0
+        self._requests = 0
+        self._budget_freed: Optional[asyncio.Condition] = None
+        self._write_slots: Optional[asyncio.Semaphore] = None
+        self._writes_active = 0
+        self._writes_waiting = 0
+        self.metrics = {
+            "admitted": 0,
+            "rejected_budget": 0,
+            "rejected_too_large": 0,
+            "rejected_no_length": 0,
+            "rejected_write_queue": 0,
+            "peak_reserved_bytes": 0,
+            "peak_write_queue": 0,
+        }
+
+    def _condition(self) -> asyncio.Condition:
+        if self._budget_freed is None:
+            self._budget_freed = asyncio.Condition()
+        return self._budget_freed
+
+    def _slots(self) -> asyncio.Semaphore:
+        if self._write_slots is None:
+            self._write_slots = asyncio.Semaphore(max(1, self.write_concurrency))
+        return self._write_slots
+
+    def busy(self, detail: str = "Server busy with uploads, please retry") -> HTTPException:
+        return HTTPException(status_code=503, detail=detail, headers={"Retry-After": str(self.retry_after)})
+
+    def try_reserve(self, size: int) -> bool:
+        if self._reserved + size > self.memory_budget:
+            self.metrics["rejected_budget"] += 1
+            return False
+        self._reserved += size
+        self._requests += 1
+        self.metrics["admitted"] += 1
+        self.metrics["peak_reserved_bytes"] = max(self.metrics["peak_reserved_bytes"], self._reserved)
+        return True
+
+    async def release(self, size: int):
+        self._reserved -= size
+        self._requests -= 1
+        condition = self._condition()
+        async with condition:
+            condition.notify_all()
+
+    @asynccontextmanager
+    async def hold(self, size: int):
+        """Reserve budget for background work, waiting until it is available"""
+        size = min(size, self.memory_budget)
+        condition = self._condition()
+        async with condition:
+            await condition.wait_for(lambda: self._reserved + size <= self.memory_budget)
+            self._reserved += size
+            self._requests += 1
+        try:
+            yield
+        finally:
+            await self.release(size)
+
+    @asynccontextmanager
+    async def write_slot(self, fail_fast: bool = True):
+        """One of the STORAGE_WRITE_CONCURRENCY storage write slots"""
+        slots = self._slots()
+        if fail_fast and slots.locked() and self._writes_waiting >= self.max_write_queue:
+            self.metrics["rejected_write_queue"] += 1
+            raise self.busy("Storage busy, please retry")
+        self._writes_waiting += 1
+        self.metrics["peak_write_queue"] = max(self.metrics["peak_write_queue"], self._writes_waiting)
+        try:
+            await slots.acquire()
+        finally:
+            self._writes_waiting -= 1
+        self._writes_active += 1
+        try:
+            yield
+        finally:
+            self._writes_active -= 1
+            slots.release()
+
+    def stats(self) -> dict:
+        return {
+            **self.metrics,
+            "reserved_bytes": self._reserved,
+            "memory_budget_bytes": self.memory_budget,
+            "in_flight": self._requests,
+            "storage_writes_active": self._writes_active,
+            "storage_write_queue": self._writes_waiting,
+            "storage_write_concurrency": self.write_concurrency,
+        }
+
+
+upload_admission = UploadAdmission()
+
+
+class UploadAdmissionMiddleware:
+    """
+    ASGI middleware admitting upload requests against the memory budget
+
+    Runs before the body is received, so a rejected upload costs nothing
+    but its headers. The reservation is held while the body is received.
+    """
+
+    def __init__(self, app, paths: tuple = UPLOAD_PATHS):
+        self.app = app
+        self.paths = paths
+
+    async def _reject(self, send, status_code: int, detail: str, headers: Optional[dict] = None):
+        body = json.dumps({"detail": detail}).encode()
+        raw_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        raw_headers += [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()]
+        # The client may still be sending the body; don't reuse the connection
+        raw_headers.append((b"connection", b"close"))
+        await send({"type": "http.response.start", "status": status_code, "headers": raw_headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        try:
+            size = int(headers[b"content-length"])
+        except (KeyError, ValueError):
+            upload_admission.metrics["rejected_no_length"] += 1
+            await self._reject(send, 411, "Content-Length required for uploads")
+            return
+
+        if size > upload_admission.memory_budget:
+            upload_admission.metrics["rejected_too_large"] += 1
+            await self._reject(send, 413, "Upload too large")
+            return
+
+        if not upload_admission.try_reserve(size):
+            busy = upload_admission.busy()
+            await self._reject(send, busy.status_code, busy.detail, busy.headers)
+            return
+
+        # The reservation covers receiving the body only. It is returned as
+        # soon as the body is in or the response starts, never after the
+        # response: background tasks run before self.app returns and a
+        # rendition task waiting in hold() must not wait on its own request.
+        released = False
+
+        async def release():
+            nonlocal released
+            if not released:
+                released = True
+                await upload_admission.release(size)
+
+        async def receive_body():
+            message = await receive()
+            if message["type"] == "http.disconnect" or (
+                message["type"] == "http.request" and not message.get("more_body", False)
+            ):
+                await release()
+            return message
+
+        async def send_response(message):
+            if message["type"] == "http.response.start":
+                await release()
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, send_response)
+        finally:
+            await release()
@@ -0,0 +1,94 @@
+# backend/app/services/user_search.py
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from app.db import get_database
+from app.utils.user_views import USER_CARD_PROJECTION
+
+logger = logging.getLogger(__name__)
+
+MAX_RESULTS = 50
+# Sorts after every valid code point, so [prefix, prefix + this) is every
+# string starting with prefix
+PREFIX_END = "\U0010ffff"
+
+
+def normalize_username(username: str) -> str:
+    return (username or "").strip().lower()
+
+
+class UserSearch:
+    """
+    Username typeahead over the indexed, lowercased username_lower field
+
+    A prefix becomes a plain range on the index, so user input is never
+    interpreted as a regex and each lookup reads at most `limit` keys.
+    Results for short prefixes, which match the most users and are typed
+    the most, are kept in a small TTL cache.
+    """
+
+    def __init__(self):
+        self.cache_prefix_len = int(os.getenv("USER_SEARCH_CACHE_PREFIX_LEN", "3"))
+        self.cache_ttl = float(os.getenv("USER_SEARCH_CACHE_SECONDS", "30"))
+        self.cache_entries = int(os.getenv("USER_SEARCH_CACHE_ENTRIES", "2048"))
+        self._cache: OrderedDict = OrderedDict()
+
+    async def search(self, prefix: str, limit: int = 10) -> list:
+        prefix = normalize_username(prefix)
+        limit = max(1, min(limit, MAX_RESULTS))
+        if not prefix:
+            return []
+
+        cacheable = len(prefix) <= self.cache_prefix_len
+        key = (prefix, limit)
+        if cacheable:
+            cached = self._cache.get(key)
+            if cached and cached[0] > time.monotonic():
+                self._cache.move_to_end(key)
+                return cached[1]
+
+        db = get_database()
+        users = await (
+            db["users"]
+            .find({"username_lower": {"$gte": prefix, "$lt": prefix + PREFIX_END}}, USER_CARD_PROJECTION)
+            .sort("username_lower", 1)
+            .limit(limit)
+            .to_list(limit)
+        )
+
+        if cacheable:
+            self._cache[key] = (time.monotonic() + self.cache_ttl, users)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        return users
+
+    def invalidate(self, username: str):
+        """Drop cached results a new or renamed username would appear in"""
+        name = normalize_username(username)
+        for key in [key for key in self._cache if name.startswith(key[0])]:
+            self._cache.pop(key, None)
+
+    async def backfill(self) -> int:
+        """Set username_lower on users created before the field existed"""
+        db = get_database()
+        result = await db["users"].update_many(
+            {"username_lower": {"$exists": False}, "username": {"$type": "string"}},
+            [{"$set": {"username_lower": {"$toLower": {"$trim": {"input": "$username"}}}}}]
+        )
+        return result.modified_count
+
+
+user_search = UserSearch()
+
+
+if __name__ == "__main__":
+    from app.db import init_db
+
+    async def main():
+        await init_db()
+        print({"users_backfilled": await user_search.backfill()})
+
+    asyncio.run(main())
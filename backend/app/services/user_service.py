@@ -2,6 +2,7 @@
 from app.models.user_model import User
 from app.schemas.user_schema import UserOut
 from fastapi import HTTPException
+from app.services.auth_cache import auth_cache
 from beanie import PydanticObjectId
 from typing import List
 
@@ -19,4 +20,5 @@ async def delete_user(user_id: PydanticObjectId):
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     await user.delete()
+    auth_cache.invalidate_user(user_id)
     return {"detail": "User deleted successfully"}
@@ -0,0 +1,38 @@
+# backend/app/utils/fast_json.py
+import json
+from datetime import date, datetime
+from typing import Any
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - plain json fallback
+    orjson = None
+
+
+def _default(value: Any):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered natively, with ObjectId and datetime handled inline
+
+    List endpoints declare their response_model for the API schema and
+    return this response directly, which skips FastAPI's per-field
+    validation and jsonable_encoder walk over every document.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
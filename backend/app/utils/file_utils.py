@@ -2,9 +2,9 @@
 import os
 from fastapi import UploadFile, HTTPException
 from datetime import datetime
+from app.services.storage_backend import storage
 
-UPLOAD_DIR = "static/uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
+UPLOAD_DIR = f"{storage.base_path}/uploads/files"
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "pdf", "docx"}
 MAX_FILE_SIZE = 5 * 1024 * 1024 
 
@@ -13,21 +13,14 @@ async def save_upload_file(upload_file: UploadFile) -> str:
     if file_extension not in ALLOWED_EXTENSIONS:
         raise HTTPException(status_code=400, detail="File type not allowed")
 
-    contents = await upload_file.read()
-    if len(contents) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="File size exceeds limit")
-
     timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-    safe_filename = f"{timestamp}_{upload_file.filename}"
-    file_path = os.path.join(UPLOAD_DIR, safe_filename)
+    safe_filename = f"{timestamp}_{os.path.basename(upload_file.filename)}"
+    file_path = f"{UPLOAD_DIR}/{safe_filename}"
 
-    with open(file_path, "wb") as f:
-        f.write(contents)
+    await storage.write_stream(file_path, upload_file.file, MAX_FILE_SIZE, require_image=False)
 
     return file_path
 
 async def remove_file(file_path: str):
-    if os.path.exists(file_path):
-        os.remove(file_path)
-    else:
+    if not await storage.delete(file_path):
         raise HTTPException(status_code=404, detail="File not found")
@@ -0,0 +1,103 @@
+# backend/app/utils/geo.py
+import math
+from typing import BinaryIO, Optional, Tuple
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+MAX_PRECISION = 7
+EDGE_STEP_DEGREES = 1.0
+MAX_LATITUDE = 89.9
+
+GPS_IFD = 0x8825
+GPS_LATITUDE_REF, GPS_LATITUDE, GPS_LONGITUDE_REF, GPS_LONGITUDE = 1, 2, 3, 4
+
+
+def geohash(lat: float, lon: float, precision: int = MAX_PRECISION) -> str:
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def point(lat: float, lon: float) -> dict:
+    """GeoJSON point; note GeoJSON puts longitude first"""
+    return {"type": "Point", "coordinates": [lon, lat]}
+
+
+def valid_coordinates(lat, lon) -> bool:
+    return lat is not None and lon is not None and -90 <= lat <= 90 and -180 <= lon <= 180
+
+
+def zoom_precision(zoom: int) -> int:
+    """Geohash length whose cells give a few dozen clusters across a map viewport"""
+    for max_zoom, precision in ((2, 1), (4, 2), (7, 3), (9, 4), (12, 5), (14, 6)):
+        if zoom <= max_zoom:
+            return precision
+    return MAX_PRECISION
+
+
+def bbox_polygons(west: float, south: float, east: float, north: float) -> list:
+    """
+    GeoJSON polygons covering a map bounding box
+
+    A box crossing the antimeridian (west > east) is split in two, and wide
+    boxes are cut into strips so no edge spans 180 degrees or more.
+    MongoDB treats polygon edges as geodesics, which bow toward the pole
+    instead of following a parallel, so the south and north edges get a
+    vertex at least every EDGE_STEP_DEGREES of longitude.
+    """
+    # Vertices at a pole would all be the same point
+    south, north = max(south, -MAX_LATITUDE), min(north, MAX_LATITUDE)
+    spans = [(west, 180.0), (-180.0, east)] if west > east else [(west, east)]
+    polygons = []
+    for start, end in spans:
+        while start < end:
+            stop = min(end, start + 90.0)
+            steps = max(1, math.ceil((stop - start) / EDGE_STEP_DEGREES))
+            longitudes = [start + (stop - start) * i / steps for i in range(steps + 1)]
+            ring = [[lon, south] for lon in longitudes] + [[lon, north] for lon in reversed(longitudes)]
+            ring.append(ring[0])
+            polygons.append({"type": "Polygon", "coordinates": [ring]})
+            start = stop
+    return polygons
+
+
+def _degrees(value, ref) -> float:
+    degrees, minutes, seconds = (float(part) for part in value)
+    decimal = degrees + minutes / 60 + seconds / 3600
+    return -decimal if ref in ("S", "W", b"S", b"W") else decimal
+
+
+def exif_gps(source: BinaryIO) -> Optional[Tuple[float, float]]:
+    """
+    (lat, lon) from a photo's EXIF GPS block, or None
+
+    Only the image header is parsed; the spool is rewound afterwards.
+    """
+    from PIL import Image
+
+    try:
+        source.seek(0)
+        with Image.open(source) as image:
+            gps = image.getexif().get_ifd(GPS_IFD)
+        if not gps or GPS_LATITUDE not in gps or GPS_LONGITUDE not in gps:
+            return None
+        lat = _degrees(gps[GPS_LATITUDE], gps.get(GPS_LATITUDE_REF))
+        lon = _degrees(gps[GPS_LONGITUDE], gps.get(GPS_LONGITUDE_REF))
+        return (lat, lon) if valid_coordinates(lat, lon) else None
+    except Exception:
+        return None
+    finally:
+        source.seek(0)
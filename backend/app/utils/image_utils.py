@@ -0,0 +1,41 @@
+# backend/app/utils/image_utils.py
+from typing import Optional
+
+try:
+    import magic
+except ImportError:
+    magic = None
+
+# Leading bytes of the image formats we accept, used when libmagic is missing
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+]
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """
+    Detect the MIME type of an image from its first bytes
+    
+    Returns None when the data does not look like an image.
+    """
+    if magic is not None:
+        try:
+            mime = magic.from_buffer(head, mime=True)
+            return mime if mime.startswith("image/") else None
+        except Exception:
+            pass
+    
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:8] == b"ftyp" and head[8:12] in (b"heic", b"heix", b"mif1", b"msf1"):
+        return "image/heic"
+    for signature, mime in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return mime
+    return None
@@ -0,0 +1,37 @@
+# backend/app/utils/ndjson.py
+from app.utils.fast_json import dumps
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def stream_ndjson(cursor, flush_rows: int = 200):
+    """
+    Encode documents from an async cursor as NDJSON, a few hundred rows per chunk
+
+    Only the current Motor batch and one chunk are held in memory, so the
+    export size does not depend on the collection size.
+    """
+    lines = []
+    async for document in cursor:
+        lines.append(dumps(document))
+        if len(lines) >= flush_rows:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+async def stream_json_array(cursor, flush_rows: int = 200):
+    """Encode documents from an async cursor as one JSON array, chunk by chunk"""
+    yield b"["
+    first = True
+    lines = []
+    async for document in cursor:
+        lines.append(dumps(document))
+        if len(lines) >= flush_rows:
+            yield (b"" if first else b",") + b",".join(lines)
+            first = False
+            lines = []
+    if lines:
+        yield (b"" if first else b",") + b",".join(lines)
+    yield b"]"
@@ -0,0 +1,43 @@
+# backend/app/utils/pagination.py
+import json
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+
+
+def encode_cursor(created_at: datetime, doc_id) -> str:
+    """Opaque continuation token for the document a page ended on"""
+    payload = json.dumps({"t": created_at.isoformat(), "id": str(doc_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(payload["t"]), ObjectId(payload["id"])
+    except (ValueError, KeyError, TypeError, InvalidId, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_filter(cursor: Optional[str], id_field: str = "_id") -> dict:
+    """
+    Filter for documents after a cursor in (created_at desc, id_field desc) order
+
+    Used with a matching compound index this is a bounded index range scan,
+    so every page costs the same however deep it is.
+    """
+    if not cursor:
+        return {}
+    created_at, doc_id = decode_cursor(cursor)
+    return {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, id_field: {"$lt": doc_id}}
+    ]}
+
+
+KEYSET_SORT = [("created_at", -1), ("_id", -1)]
@@ -0,0 +1,75 @@
+# backend/app/utils/range_utils.py
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Optional, Tuple
+
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a Range header points outside of the resource"""
+
+
+def make_etag(path: str, size: int) -> str:
+    """Build a strong ETag from the stored path and size of a file"""
+    digest = hashlib.sha1(f"{path}:{size}".encode("utf-8")).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    """Format a naive UTC datetime for Last-Modified style headers"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        if candidate.strip().removeprefix("W/") == bare:
+            return True
+    return False
+
+
+def parse_range_header(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a Range header into an inclusive (start, end) byte pair
+    
+    Returns None when there is no usable single byte range, in which case
+    the full body should be sent. Raises RangeNotSatisfiable when the
+    range starts past the end of the file.
+    """
+    if not range_header or size <= 0:
+        return None
+    
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    
+    start_str, sep, end_str = spec.strip().partition("-")
+    if not sep:
+        return None
+    
+    try:
+        if start_str == "":
+            suffix = int(end_str)
+            if suffix <= 0:
+                raise RangeNotSatisfiable(range_header)
+            return max(size - suffix, 0), size - 1
+        
+        start = int(start_str)
+        end = int(end_str) if end_str else size - 1
+    except ValueError:
+        return None
+    
+    if start >= size:
+        raise RangeNotSatisfiable(range_header)
+    if end < start:
+        return None
+    return start, min(end, size - 1)
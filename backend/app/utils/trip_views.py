@@ -0,0 +1,36 @@
+# backend/app/utils/trip_views.py
+
+# Fields the gallery renders; list views return only these plus photo URLs
+TRIP_SUMMARY_FIELDS = ["user_id", "username", "country", "place_name", "created_at"]
+# Cards clamp the description to a few lines, so summaries carry a prefix
+DESCRIPTION_PREVIEW_CHARS = 300
+
+
+def trip_url_fields() -> dict:
+    """String ID and photo URLs as Mongo expressions, for projections and $set"""
+    trip_id = {"$toString": "$_id"}
+    return {
+        "_id": trip_id,
+        "photo_url": {"$concat": ["/api/trips/photo/", trip_id]},
+        "thumbnail_url": {"$concat": ["/api/trips/photo/", trip_id, "?thumbnail=true"]},
+    }
+
+
+def trip_summary_projection() -> dict:
+    return {
+        **{field: 1 for field in TRIP_SUMMARY_FIELDS},
+        "description": {"$substrCP": [{"$ifNull": ["$description", ""]}, 0, DESCRIPTION_PREVIEW_CHARS]},
+        **trip_url_fields(),
+    }
+
+
+def trip_summary(trip: dict) -> dict:
+    """The summary projection applied in Python to a trip document already in hand"""
+    trip_id = str(trip["_id"])
+    return {
+        "_id": trip_id,
+        **{field: trip.get(field) for field in TRIP_SUMMARY_FIELDS},
+        "description": (trip.get("description") or "")[:DESCRIPTION_PREVIEW_CHARS],
+        "photo_url": f"/api/trips/photo/{trip_id}",
+        "thumbnail_url": f"/api/trips/photo/{trip_id}?thumbnail=true",
+    }
@@ -0,0 +1,60 @@
+# backend/app/utils/upload_utils.py
+import hashlib
+from typing import BinaryIO
+from fastapi import HTTPException
+from app.utils.image_utils import sniff_image_type
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def iter_upload_chunks(
+    source: BinaryIO,
+    max_size: int,
+    upload: dict,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    require_image: bool = True
+):
+    """
+    Yield fixed-size chunks from an upload spool
+    
+    While iterating, the size limit is enforced and upload["size"],
+    upload["content_type"] and (once exhausted) upload["sha256"] are filled
+    in, so callers can pipe the chunks anywhere without buffering the file.
+    """
+    hasher = hashlib.sha256()
+    source.seek(0)
+    
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        
+        if upload["size"] == 0:
+            upload["content_type"] = sniff_image_type(chunk)
+            if not upload["content_type"]:
+                if require_image:
+                    raise HTTPException(status_code=400, detail="File must be an image")
+                upload["content_type"] = "application/octet-stream"
+        
+        upload["size"] += len(chunk)
+        if upload["size"] > max_size:
+            label = "Image" if require_image else "File"
+            raise HTTPException(
+                status_code=400,
+                detail=f"{label} size must be less than {max_size // (1024 * 1024)}MB"
+            )
+        
+        hasher.update(chunk)
+        yield chunk
+    
+    if upload["size"] == 0 and require_image:
+        raise HTTPException(status_code=400, detail="File must be an image")
+    upload["sha256"] = hasher.hexdigest()
+
+
+def inspect_upload(source: BinaryIO, max_size: int, chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """Size-check, hash and sniff a local upload spool without sending it anywhere"""
+    upload = {"size": 0, "sha256": None, "content_type": None}
+    for _ in iter_upload_chunks(source, max_size, upload, chunk_size):
+        pass
+    return upload
@@ -0,0 +1,13 @@
+# backend/app/utils/user_views.py
+
+# User card fields computed by Mongo, so list endpoints need no per-user Python work
+USER_CARD_PROJECTION = {
+    "_id": 0,
+    "id": {"$toString": "$_id"},
+    "username": 1,
+    "email": 1,
+    "profilePic": {"$ifNull": ["$profilePic", None]},
+    "countriesVisited": {"$ifNull": ["$countriesVisited", 0]},
+    "followersCount": {"$ifNull": ["$followers_count", 0]},
+    "followingCount": {"$ifNull": ["$following_count", 0]},
+}
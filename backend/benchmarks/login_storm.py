@@ -0,0 +1,107 @@
+# backend/benchmarks/login_storm.py
+"""
+Login storm benchmark
+
+Hammers POST /api/auth/login with concurrent logins while probing an
+unrelated endpoint, then reports login throughput and the probe's latency
+percentiles. Run it against a live server before and after changing
+BCRYPT_ROUNDS / PASSWORD_HASH_WORKERS / PASSWORD_MAX_PENDING:
+
+    pip install httpx
+    python benchmarks/login_storm.py --base-url http://localhost:8000 \
+        --email bench@example.com --password secret --concurrency 64 --duration 30
+
+The account must already exist (register it once through /api/auth/register).
+"""
+import time
+import asyncio
+import argparse
+from collections import Counter
+
+import httpx
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def login_worker(client: httpx.AsyncClient, args, deadline: float, statuses: Counter, latencies: list):
+    payload = {"email": args.email, "password": args.password}
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        try:
+            response = await client.post("/api/auth/login", json=payload)
+            statuses[response.status_code] += 1
+            if response.status_code == 200:
+                latencies.append(time.monotonic() - started)
+        except httpx.HTTPError:
+            statuses["error"] += 1
+
+
+async def probe_worker(client: httpx.AsyncClient, args, deadline: float, latencies: list, failures: Counter):
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        try:
+            response = await client.get(args.probe)
+            if response.status_code != 200:
+                failures[response.status_code] += 1
+            latencies.append(time.monotonic() - started)
+        except httpx.HTTPError:
+            failures["error"] += 1
+        await asyncio.sleep(args.probe_interval)
+
+
+async def run(args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency + 4, max_keepalive_connections=args.concurrency + 4)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        # Baseline probe latency with no login load
+        baseline, baseline_failures = [], Counter()
+        await probe_worker(client, args, time.monotonic() + args.baseline, baseline, baseline_failures)
+
+        statuses, login_latencies = Counter(), []
+        probe_latencies, probe_failures = [], Counter()
+        deadline = time.monotonic() + args.duration
+        started = time.monotonic()
+        await asyncio.gather(
+            probe_worker(client, args, deadline, probe_latencies, probe_failures),
+            *[login_worker(client, args, deadline, statuses, login_latencies) for _ in range(args.concurrency)]
+        )
+        elapsed = time.monotonic() - started
+
+    ms = 1000
+    return {
+        "login_ok_per_sec": round(statuses[200] / elapsed, 1),
+        "login_statuses": dict(statuses),
+        "login_p50_ms": round(percentile(login_latencies, 50) * ms, 1),
+        "login_p99_ms": round(percentile(login_latencies, 99) * ms, 1),
+        "probe_baseline_p50_ms": round(percentile(baseline, 50) * ms, 1),
+        "probe_baseline_p99_ms": round(percentile(baseline, 99) * ms, 1),
+        "probe_under_load_p50_ms": round(percentile(probe_latencies, 50) * ms, 1),
+        "probe_under_load_p99_ms": round(percentile(probe_latencies, 99) * ms, 1),
+        "probe_failures": dict(probe_failures),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--probe", default="/api/health", help="unrelated endpoint to time during the storm")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--baseline", type=float, default=5.0)
+    parser.add_argument("--probe-interval", type=float, default=0.02)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    for key, value in asyncio.run(run(args)).items():
+        print(f"{key:26} {value}")
+
+
+if __name__ == "__main__":
+    main()